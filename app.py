@@ -1,51 +1,413 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_mail import Mail, Message
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.utils import safe_join
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
 from datetime import datetime, timezone, timedelta
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import base64
+import csv
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import math
+import mimetypes
+import multiprocessing
 import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+import click
 from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///ticketing_system.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', os.path.join(os.path.dirname(__file__), 'uploads'))
-app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH_MB', 16)) * 1024 * 1024  # 16 MB default
-
-# Ensure upload directory exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-# Email configuration
-app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
-app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
-app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
-app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER')
-
-# Initialize extensions
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is used when brotli is not installed
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: bootstrap runs without the inter-process lock
+    fcntl = None
+
+# Extensions are bound to an application in create_app()
+db = SQLAlchemy()
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
 login_manager.login_message = 'Please log in to access this page.'
-mail = Mail(app)
+mail = Mail()
+
+bp = Blueprint('main', __name__, cli_group=None)
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+def load_config(app):
+    """Populate app.config from the environment (and a .env file, if present)."""
+    # Load environment variables
+    load_dotenv()
+
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///ticketing_system.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', os.path.join(os.path.dirname(__file__), 'uploads'))
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH_MB', 16)) * 1024 * 1024  # 16 MB default
+    # Run the one-time schema/default-data bootstrap from create_app()
+    app.config['BOOTSTRAP_ON_START'] = os.environ.get('BOOTSTRAP_ON_START', '1') != '0'
+
+    # Static asset and response compression configuration
+    app.config['ASSET_DIST_FOLDER'] = os.path.join(app.static_folder, 'dist')
+    app.config['ASSET_MAX_AGE'] = int(os.environ.get('ASSET_MAX_AGE', 365 * 24 * 3600))
+    app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes
+    app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 6))
+
+    # Email configuration
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = True
+    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER')
+
+    # Cache configuration
+    app.config['USER_CACHE_TTL'] = float(os.environ.get('USER_CACHE_TTL', 30))  # seconds, 0 disables
+    app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    # Optional shared file touched on invalidation so every worker drops its identity cache
+    app.config['USER_CACHE_INVALIDATION_FILE'] = os.environ.get('USER_CACHE_INVALIDATION_FILE')
+    app.config['REFERENCE_CACHE_TTL'] = float(os.environ.get('REFERENCE_CACHE_TTL', 300))  # seconds, 0 disables
+    app.config['REFERENCE_CACHE_INVALIDATION_FILE'] = os.environ.get('REFERENCE_CACHE_INVALIDATION_FILE')
+    # Rendered template fragments ({% cache %} blocks) kept per worker, 0 disables
+    app.config['FRAGMENT_CACHE_SIZE'] = int(os.environ.get('FRAGMENT_CACHE_SIZE', 5000))
+
+    # Login throttling (token buckets per client IP and per username)
+    app.config['LOGIN_THROTTLE_ENABLED'] = os.environ.get('LOGIN_THROTTLE_ENABLED', '1') != '0'
+    app.config['LOGIN_IP_BURST'] = int(os.environ.get('LOGIN_IP_BURST', 20))
+    app.config['LOGIN_IP_PER_MINUTE'] = float(os.environ.get('LOGIN_IP_PER_MINUTE', 10))
+    app.config['LOGIN_USER_BURST'] = int(os.environ.get('LOGIN_USER_BURST', 5))
+    app.config['LOGIN_USER_PER_MINUTE'] = float(os.environ.get('LOGIN_USER_PER_MINUTE', 2))
+    app.config['LOGIN_LOCKOUT_THRESHOLD'] = int(os.environ.get('LOGIN_LOCKOUT_THRESHOLD', 5))  # failures
+    app.config['LOGIN_LOCKOUT_BASE'] = float(os.environ.get('LOGIN_LOCKOUT_BASE', 30))  # seconds, doubles per failure
+    app.config['LOGIN_LOCKOUT_MAX'] = float(os.environ.get('LOGIN_LOCKOUT_MAX', 900))
+    # Optional SQLite file shared by all workers; per-process memory otherwise
+    app.config['LOGIN_THROTTLE_STORE'] = os.environ.get('LOGIN_THROTTLE_STORE')
+    # Use X-Forwarded-For for the client IP (only behind a trusted proxy)
+    app.config['LOGIN_THROTTLE_TRUST_PROXY'] = os.environ.get('LOGIN_THROTTLE_TRUST_PROXY', '0') == '1'
+    # Werkzeug hash method for new passwords; outdated hashes are upgraded on login
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+
+    # Background report and export jobs
+    app.config['REPORT_WORKERS'] = int(os.environ.get('REPORT_WORKERS', 1))  # processes per web worker
+    app.config['REPORT_RESULTS_FOLDER'] = os.environ.get('REPORT_RESULTS_FOLDER', os.path.join(app.instance_path, 'reports'))
+    app.config['REPORT_RESULT_TTL'] = float(os.environ.get('REPORT_RESULT_TTL', 24 * 3600))  # seconds results stay downloadable
+    # Running jobs without a progress update for this long are assumed lost and requeued
+    app.config['REPORT_JOB_STALE_SECONDS'] = float(os.environ.get('REPORT_JOB_STALE_SECONDS', 600))
+    # A job whose process died this many times (e.g. out of memory) is failed instead of retried
+    app.config['REPORT_JOB_MAX_ATTEMPTS'] = int(os.environ.get('REPORT_JOB_MAX_ATTEMPTS', 3))
+
+    # Orphaned upload sweeping
+    app.config['UPLOAD_SWEEP_INTERVAL'] = float(os.environ.get('UPLOAD_SWEEP_INTERVAL', 3600))  # seconds, 0 disables
+    app.config['UPLOAD_SWEEP_BATCH'] = int(os.environ.get('UPLOAD_SWEEP_BATCH', 1000))  # files per lookup
+    # Unreferenced files younger than this may belong to an upload still being committed
+    app.config['UPLOAD_ORPHAN_GRACE'] = float(os.environ.get('UPLOAD_ORPHAN_GRACE', 3600))
+    app.config['UPLOAD_QUARANTINE_SECONDS'] = float(os.environ.get('UPLOAD_QUARANTINE_SECONDS', 7 * 86400))
+
+    # Background health sampling
+    app.config['HEALTH_SAMPLE_INTERVAL'] = float(os.environ.get('HEALTH_SAMPLE_INTERVAL', 15))  # seconds, 0 disables
+    app.config['HEALTH_HISTORY_SIZE'] = int(os.environ.get('HEALTH_HISTORY_SIZE', 240))  # samples kept
+
+    # Automatic ticket assignment (enabled per category in the admin panel)
+    app.config['AUTO_ASSIGN_RESYNC_SECONDS'] = float(os.environ.get('AUTO_ASSIGN_RESYNC_SECONDS', 60))
+    # Optional shared file touched after role, skill and bulk changes so other workers rebuild assignment state
+    app.config['AUTO_ASSIGN_INVALIDATION_FILE'] = os.environ.get('AUTO_ASSIGN_INVALIDATION_FILE')
+
+    # Duplicate ticket detection
+    app.config['DUPLICATE_THRESHOLD'] = float(os.environ.get('DUPLICATE_THRESHOLD', 0.5))  # estimated Jaccard similarity
+    # Link new tickets to the best match at or above this similarity; 0 disables
+    app.config['DUPLICATE_AUTO_LINK_THRESHOLD'] = float(os.environ.get('DUPLICATE_AUTO_LINK_THRESHOLD', 0))
+    app.config['DUPLICATE_INDEX_RESYNC_SECONDS'] = float(os.environ.get('DUPLICATE_INDEX_RESYNC_SECONDS', 30))
+
+# In-process caches
+class LRUCache:
+    """Thread-safe, bounded LRU cache with an optional per-entry TTL."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class InvalidationSignal:
+    """Cross-worker invalidation based on the mtime of a shared file.
+
+    Without a path this is a no-op and caches are purely per worker.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._seen_stamp = self._read_stamp()
+
+    def _read_stamp(self):
+        if not self.path:
+            return None
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def changed(self):
+        """Return True once for every signal fired since the last call."""
+        if not self.path:
+            return False
+        stamp = self._read_stamp()
+        if stamp == self._seen_stamp:
+            return False
+        self._seen_stamp = stamp
+        return True
+
+    def fire(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'a'):
+                os.utime(self.path, None)
+            self._seen_stamp = self._read_stamp()
+        except OSError as e:
+            print(f"Failed to signal cache invalidation ({self.path}): {e}")
+
+class UserIdentityCache:
+    """Per-worker cache of user rows used by the Flask-Login user loader.
+
+    Entries are plain column snapshots rather than ORM instances, so they never
+    outlive the session that loaded them. When an invalidation file is
+    configured, touching it clears the cache in every worker on its next lookup.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30, invalidation_file=None):
+        self.configure(maxsize, ttl, invalidation_file)
+
+    def configure(self, maxsize, ttl, invalidation_file=None):
+        self.enabled = bool(ttl) and maxsize > 0
+        self._entries = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._signal = InvalidationSignal(invalidation_file)
+
+    def init_app(self, app):
+        self.configure(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'],
+                       app.config['USER_CACHE_INVALIDATION_FILE'])
+
+    def _sync(self):
+        if self._signal.changed():
+            self._entries.clear()
+
+    def get(self, user_id):
+        if not self.enabled:
+            return None
+        self._sync()
+        return self._entries.get(user_id)
+
+    def put(self, user):
+        if not self.enabled:
+            return
+        self._entries.set(user.id, {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'password_hash': user.password_hash,
+            'role': user.role,
+            'created_at': user.created_at,
+        })
+
+    def invalidate(self, user_id=None):
+        """Drop one user (or everyone) locally and signal the other workers."""
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id)
+        self._signal.fire()
+
+user_cache = UserIdentityCache()
+
+CategoryRef = namedtuple('CategoryRef', 'id name description')
+StaffRef = namedtuple('StaffRef', 'id username email role')
+
+class ReferenceDataCache:
+    """Process-local cache of rarely-changing lookup lists (categories, staff).
+
+    Values are immutable snapshots so they can be shared across requests and
+    threads. Callers must invalidate after writing the underlying rows.
+    """
+
+    def __init__(self, ttl=300, invalidation_file=None):
+        self.configure(ttl, invalidation_file)
+        self._loaders = {
+            'categories': self._load_categories,
+            'staff': self._load_staff,
+            'admins': self._load_admins,
+        }
+
+    def configure(self, ttl, invalidation_file=None):
+        self.enabled = bool(ttl)
+        self._entries = LRUCache(maxsize=16, ttl=ttl)
+        self._signal = InvalidationSignal(invalidation_file)
+
+    def init_app(self, app):
+        self.configure(app.config['REFERENCE_CACHE_TTL'], app.config['REFERENCE_CACHE_INVALIDATION_FILE'])
+
+    @staticmethod
+    def _load_categories():
+        return tuple(CategoryRef(c.id, c.name, c.description) for c in Category.query.order_by(Category.id).all())
+
+    @staticmethod
+    def _load_staff():
+        staff = User.query.filter(User.role.in_(['admin', 'technician'])).order_by(User.id).all()
+        return tuple(StaffRef(u.id, u.username, u.email, u.role) for u in staff)
+
+    @staticmethod
+    def _load_admins():
+        admins = User.query.filter_by(role='admin').order_by(User.id).all()
+        return tuple(StaffRef(u.id, u.username, u.email, u.role) for u in admins)
+
+    def _get(self, name):
+        if not self.enabled:
+            return self._loaders[name]()
+        if self._signal.changed():
+            self._entries.clear()
+        value = self._entries.get(name)
+        if value is None:
+            value = self._loaders[name]()
+            self._entries.set(name, value)
+        return value
+
+    def categories(self):
+        return self._get('categories')
+
+    def staff(self):
+        """Admins and technicians, i.e. everyone tickets can be assigned to."""
+        return self._get('staff')
+
+    def admins(self):
+        return self._get('admins')
+
+    def invalidate(self, *names):
+        """Drop the named lists (all of them when called without arguments)."""
+        if names:
+            for name in names:
+                self._entries.pop(name)
+        else:
+            self._entries.clear()
+        self._signal.fire()
+
+reference_cache = ReferenceDataCache()
+
+class FragmentCacheExtension(Extension):
+    """Jinja tag that renders its body once per key: {% cache key %}...{% endcache %}.
+
+    The key must change whenever the output would, e.g. (ticket.id,
+    ticket.updated_at), so entries never need explicit invalidation and stale
+    ones simply fall out of the LRU.
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [key]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        return fragment_cache.render(key, caller)
+
+class FragmentCache:
+    """Bounded LRU of rendered template fragments, used through the {% cache %} tag."""
+
+    def __init__(self, maxsize=5000):
+        self.configure(maxsize)
+
+    def configure(self, maxsize):
+        self.enabled = maxsize > 0
+        self._entries = LRUCache(maxsize=max(maxsize, 1))
+
+    def init_app(self, app):
+        self.configure(app.config['FRAGMENT_CACHE_SIZE'])
+        app.jinja_env.add_extension(FragmentCacheExtension)
+
+    def render(self, key, caller):
+        if not self.enabled:
+            return caller()
+        html = self._entries.get(key)
+        if html is None:
+            html = str(caller())
+            self._entries.set(key, html)
+        return Markup(html)
+
+    def clear(self):
+        self._entries.clear()
+
+fragment_cache = FragmentCache()
 
 # User loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        # Re-attach the cached row to this request's session without a SELECT
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    user = User.query.get(user_id)
+    if user:
+        user_cache.put(user)
+    return user
 
 # Database Models
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)  # scrypt hashes run to ~160 characters
     role = db.Column(db.String(20), nullable=False, default='user')  # admin, technician, user
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     
@@ -54,24 +416,39 @@ class User(UserMixin, db.Model):
     assigned_tickets = db.relationship('Ticket', foreign_keys='Ticket.assigned_to_id', backref='assignee', lazy='dynamic')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
+        if self.id is not None:
+            user_cache.invalidate(self.id)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    def needs_rehash(self):
+        """True when the stored hash uses a different method or cost than the configured one."""
+        return self.password_hash.split('$', 1)[0] != password_hash_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+    
     def is_admin(self):
         return self.role == 'admin'
     
     def is_technician(self):
         return self.role in ['admin', 'technician']
 
+# Technicians who take auto-assigned tickets in a category
+technician_skill = db.Table(
+    'technician_skill',
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('category_id', db.Integer, db.ForeignKey('category.id'), primary_key=True),
+)
+
 class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     description = db.Column(db.Text)
+    auto_assign = db.Column(db.Boolean, default=False)
     
     # Relationships
     tickets = db.relationship('Ticket', backref='category', lazy='dynamic')
+    technicians = db.relationship('User', secondary=technician_skill, backref='skill_categories')
 
 class Ticket(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -80,15 +457,17 @@ class Ticket(db.Model):
     status = db.Column(db.String(20), nullable=False, default='open')  # open, in_progress, resolved, closed
     priority = db.Column(db.String(20), nullable=False, default='medium')  # low, medium, high, urgent
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), index=True)
     
     # Foreign Keys
     created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     assigned_to_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
+    parent_id = db.Column(db.Integer, db.ForeignKey('ticket.id'))  # incident this ticket duplicates
     
     # Relationships
     activity_logs = db.relationship('ActivityLog', backref='ticket', lazy='dynamic', cascade='all, delete-orphan')
+    parent = db.relationship('Ticket', remote_side=[id], backref=db.backref('duplicates', lazy='dynamic'))
 
     # --- SLA helpers ---
     def get_sla_hours(self):
@@ -125,7 +504,7 @@ class ActivityLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     action = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
     
     # Foreign Keys
     ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False)
@@ -137,10 +516,10 @@ class ActivityLog(db.Model):
 class Attachment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
-    stored_path = db.Column(db.String(500), nullable=False)
+    stored_path = db.Column(db.String(500), nullable=False, index=True)
     content_type = db.Column(db.String(100))
     size_bytes = db.Column(db.Integer)
-    uploaded_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    uploaded_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
 
     # Foreign Keys
     ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False)
@@ -150,11 +529,55 @@ class Attachment(db.Model):
     ticket = db.relationship('Ticket', backref=db.backref('attachments', lazy='dynamic', cascade='all, delete-orphan'))
     uploaded_by = db.relationship('User')
 
+class ApiToken(db.Model):
+    """Bearer token for the REST API; only a SHA-256 digest of the token is stored."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    last_used_at = db.Column(db.DateTime)
+    
+    # Foreign Keys
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    
+    # Relationships
+    user = db.relationship('User')
+
+    @staticmethod
+    def hash_token(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+class ReportJob(db.Model):
+    """A report or export run by the background job runner; results are files that expire."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # report, analytics, export
+    params = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, done, failed, expired
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # times a pool process claimed it
+    message = db.Column(db.Text)
+    result_path = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+    
+    # Foreign Keys
+    created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+class StorageUsage(db.Model):
+    """Attachment file count and bytes per ticket; ticket_id 0 holds the totals."""
+    ticket_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    file_count = db.Column(db.Integer, nullable=False, default=0)
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
 # Utility functions
 def send_notification_email(to_email, subject, body):
     """Send email notification"""
     try:
-        if app.config['MAIL_USERNAME'] and app.config['MAIL_PASSWORD']:
+        if current_app.config['MAIL_USERNAME'] and current_app.config['MAIL_PASSWORD']:
             msg = Message(subject=subject, recipients=[to_email], body=body)
             mail.send(msg)
             return True
@@ -162,8 +585,29 @@ def send_notification_email(to_email, subject, body):
         print(f"Failed to send email: {e}")
     return False
 
+@contextmanager
+def activity_unit_of_work():
+    """Group data changes and their activity log entries into a single commit.
+
+    Inside the block, log_activity() only adds rows to the session; the outer
+    block commits everything once on success and rolls back on error. Blocks
+    may be nested, in which case only the outermost one commits.
+    """
+    depth = g.get('activity_uow_depth', 0)
+    g.activity_uow_depth = depth + 1
+    try:
+        yield
+        if depth == 0:
+            db.session.commit()
+    except Exception:
+        if depth == 0:
+            db.session.rollback()
+        raise
+    finally:
+        g.activity_uow_depth = depth
+
 def log_activity(ticket_id, action, description, user_id=None):
-    """Log activity for a ticket"""
+    """Log activity for a ticket (deferred to the enclosing unit of work, if any)"""
     if user_id is None:
         user_id = current_user.id if current_user.is_authenticated else None
     
@@ -175,7 +619,31 @@ def log_activity(ticket_id, action, description, user_id=None):
             user_id=user_id
         )
         db.session.add(activity)
-        db.session.commit()
+        if not g.get('activity_uow_depth'):
+            db.session.commit()
+
+def adjust_storage_usage(ticket_id, files, size):
+    """Add to a ticket's and the global storage totals in the current transaction.
+
+    The global row (ticket_id 0) is seeded by bootstrap(). A missing row is
+    created empty inside a savepoint and then updated, so two workers adding
+    the same ticket's first attachment cannot collide on the primary key.
+    """
+    now = datetime.now(timezone.utc)
+    for key in (ticket_id, 0):
+        changes = {
+            'file_count': StorageUsage.file_count + files,
+            'total_bytes': StorageUsage.total_bytes + size,
+            'updated_at': now,
+        }
+        if StorageUsage.query.filter_by(ticket_id=key).update(changes, synchronize_session=False):
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(StorageUsage(ticket_id=key, file_count=0, total_bytes=0, updated_at=now))
+        except IntegrityError:
+            pass  # another worker created it first
+        StorageUsage.query.filter_by(ticket_id=key).update(changes, synchronize_session=False)
 
 def allowed_file(filename: str) -> bool:
     allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'txt', 'log'}
@@ -197,8 +665,7 @@ def check_and_handle_sla(ticket: 'Ticket') -> None:
         log_activity(ticket.id, 'SLA Escalated', f'SLA breached for ticket {ticket.id}. Escalating.')
         # Notify admins and assigned technician
         recipients = []
-        admins = User.query.filter_by(role='admin').all()
-        recipients.extend([a.email for a in admins])
+        recipients.extend([a.email for a in reference_cache.admins()])
         if ticket.assignee:
             recipients.append(ticket.assignee.email)
         for email in set([r for r in recipients if r]):
@@ -210,14 +677,1036 @@ def check_and_handle_sla(ticket: 'Ticket') -> None:
     except Exception as e:
         print(f"SLA check error for ticket {ticket.id}: {e}")
 
+# Shared statistics for the admin panel and reports
+TICKET_STATUSES = ['open', 'in_progress', 'resolved', 'closed']
+TICKET_PRIORITIES = ['urgent', 'high', 'medium', 'low']
+
+def _hours_between(start, end):
+    """SQL expression for the hours between two timestamp columns."""
+    if db.engine.dialect.name == 'sqlite':
+        return (db.func.julianday(end) - db.func.julianday(start)) * 24
+    return db.func.extract('epoch', end - start) / 3600
+
+def _count_if(condition, label):
+    return db.func.sum(db.case((condition, 1), else_=0)).label(label)
+
+def ticket_statistics(since=None):
+    """All ticket breakdowns from one GROUP BY category query with conditional aggregation.
+
+    Per-category rows are summed here into overall status and priority counts,
+    so callers get the whole picture for one round trip. ``by_category`` is keyed
+    by category id (None for uncategorised tickets); ``created_since`` counts
+    tickets created at or after ``since`` when it is given.
+    """
+    done = Ticket.status.in_(['resolved', 'closed'])
+    columns = [Ticket.category_id, db.func.count(Ticket.id).label('total')]
+    columns += [_count_if(Ticket.status == status, f'status_{status}') for status in TICKET_STATUSES]
+    columns += [_count_if(Ticket.priority == priority, f'priority_{priority}') for priority in TICKET_PRIORITIES]
+    columns.append(db.func.sum(db.case((done, _hours_between(Ticket.created_at, Ticket.updated_at)), else_=0)).label('resolution_hours'))
+    if since is not None:
+        columns.append(_count_if(Ticket.created_at >= since, 'created_since'))
+
+    stats = {
+        'total': 0,
+        'status': dict.fromkeys(TICKET_STATUSES, 0),
+        'priority': dict.fromkeys(TICKET_PRIORITIES, 0),
+        'by_category': {},
+        'created_since': 0,
+    }
+    resolution_hours = 0.0
+    for row in db.session.query(*columns).group_by(Ticket.category_id):
+        row = row._mapping
+        stats['total'] += row['total']
+        stats['by_category'][row['category_id']] = row['total']
+        for status in TICKET_STATUSES:
+            stats['status'][status] += row[f'status_{status}'] or 0
+        for priority in TICKET_PRIORITIES:
+            stats['priority'][priority] += row[f'priority_{priority}'] or 0
+        resolution_hours += row['resolution_hours'] or 0
+        if since is not None:
+            stats['created_since'] += row['created_since'] or 0
+
+    stats['open'] = stats['status']['open'] + stats['status']['in_progress']
+    stats['closed'] = stats['status']['resolved'] + stats['status']['closed']
+    stats['avg_resolution_hours'] = resolution_hours / stats['closed'] if stats['closed'] else 0
+    return stats
+
+def user_role_counts():
+    """Number of users per role from one GROUP BY query."""
+    counts = dict.fromkeys(['admin', 'technician', 'user'], 0)
+    counts.update(db.session.query(User.role, db.func.count(User.id)).group_by(User.role).all())
+    return counts
+
+# Static assets and compression
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/csv', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+}
+def negotiate_encoding():
+    """Pick the best content encoding the client accepts: br, gzip or None."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def compress_bytes(data, encoding, level):
+    if encoding == 'br':
+        # Quality scale differs from gzip; 11 is only worth it for prebuilt files
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=min(level, 9), mtime=0)
+
+def build_assets(static_folder, dist_folder):
+    """Write content-hashed copies of static files plus .gz/.br variants.
+
+    Returns the manifest mapping each source path to its fingerprinted path.
+    """
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_folder]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            rel_path = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            stem, ext = os.path.splitext(rel_path)
+            hashed = f'{stem}.{digest}{ext}'
+            target = os.path.join(dist_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+            if mimetypes.guess_type(name)[0] in COMPRESSIBLE_MIMETYPES:
+                variants = [('gzip', '.gz', 9)]
+                if brotli is not None:
+                    variants.append(('br', '.br', 11))
+                for encoding, suffix, level in variants:
+                    compressed = compress_bytes(data, encoding, level)
+                    if len(compressed) < len(data):
+                        with open(target + suffix, 'wb') as f:
+                            f.write(compressed)
+            manifest[rel_path] = hashed
+    with open(os.path.join(dist_folder, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def get_asset_manifest():
+    manifest = current_app.extensions.get('asset_manifest')
+    if manifest is None or current_app.debug:
+        try:
+            with open(os.path.join(current_app.config['ASSET_DIST_FOLDER'], 'manifest.json')) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        current_app.extensions['asset_manifest'] = manifest
+    return manifest
+
+@bp.app_template_global()
+def asset_url(filename):
+    """URL of the fingerprinted build of a static file, or the plain file if not built."""
+    hashed = get_asset_manifest().get(filename)
+    if hashed:
+        return url_for('main.static_asset', filename=hashed)
+    return url_for('static', filename=filename)
+
+@bp.route('/static/dist/<path:filename>')
+def static_asset(filename):
+    dist_folder = current_app.config['ASSET_DIST_FOLDER']
+    # Serve a precompressed variant written by build-assets when the client accepts it
+    max_age = current_app.config['ASSET_MAX_AGE']
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        variant = safe_join(dist_folder, filename + suffix)
+        if request.accept_encodings[encoding] and variant and os.path.isfile(variant):
+            response = send_from_directory(dist_folder, filename + suffix, max_age=max_age,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(dist_folder, filename, max_age=max_age)
+    response.vary.add('Accept-Encoding')
+    # Fingerprinted names change whenever the content does
+    response.cache_control.immutable = True
+    return response
+
+@bp.after_app_request
+def compress_response(response):
+    """Compress sizeable text responses (HTML, JSON, CSV) when the client allows it."""
+    if (response.direct_passthrough
+            or not response.is_sequence
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if not encoding:
+        return response
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+    level = current_app.config['COMPRESS_LEVEL'] if encoding == 'gzip' else 4
+    response.set_data(compress_bytes(data, encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# Login throttling
+_hash_prefixes = {}
+
+def password_hash_prefix(method):
+    """The 'method:params' part werkzeug currently writes for this hash method."""
+    if method not in _hash_prefixes:
+        _hash_prefixes[method] = generate_password_hash('', method=method).split('$', 1)[0]
+    return _hash_prefixes[method]
+
+class _MemoryThrottleStore:
+    """Per-process throttle state, bounded so a flood of keys cannot exhaust memory."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def put(self, key, state):
+        self._data[key] = state
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+class _SQLiteThrottleStore:
+    """Throttle state in a small SQLite file so every worker sees the same buckets.
+
+    Like the in-memory store it is bounded: every prune_every transactions the
+    least recently updated rows that are not locked out are deleted down to
+    maxsize, so rotating usernames cannot grow the file without limit.
+    """
+
+    def __init__(self, path, maxsize=100000, prune_every=1000):
+        self.path = path
+        self.maxsize = maxsize
+        self.prune_every = prune_every
+        self._transactions = 0
+        with sqlite3.connect(path, timeout=5) as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS login_throttle ('
+                         'key TEXT PRIMARY KEY, tokens REAL, updated REAL, failures INTEGER, locked_until REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_login_throttle_updated ON login_throttle (updated)')
+
+    @contextmanager
+    def transaction(self):
+        # One connection per transaction, never shared between threads
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            yield _SQLiteThrottleTransaction(conn)
+            self._transactions += 1
+            if self._transactions % self.prune_every == 0:
+                self._prune(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _prune(self, conn):
+        (count,) = conn.execute('SELECT COUNT(*) FROM login_throttle').fetchone()
+        if count > self.maxsize:
+            conn.execute('DELETE FROM login_throttle WHERE key IN (SELECT key FROM login_throttle '
+                         'WHERE locked_until <= ? ORDER BY updated LIMIT ?)', (time.time(), count - self.maxsize))
+
+class _SQLiteThrottleTransaction:
+    """Bucket access through one open _SQLiteThrottleStore transaction."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def get(self, key):
+        row = self._conn.execute('SELECT tokens, updated, failures, locked_until FROM login_throttle WHERE key = ?',
+                                 (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def put(self, key, state):
+        self._conn.execute('INSERT OR REPLACE INTO login_throttle VALUES (?, ?, ?, ?, ?)', (key, *state))
+
+    def delete(self, key):
+        self._conn.execute('DELETE FROM login_throttle WHERE key = ?', (key,))
+
+class LoginThrottle:
+    """Token buckets per client IP and per username with exponential lockout.
+
+    acquire() runs before any password hashing, so rejected attempts cost a
+    dictionary lookup rather than a deliberately slow hash. Each bucket entry
+    is (tokens, updated_at, consecutive_failures, locked_until); only username
+    buckets lock out, so one noisy client behind a shared NAT address is held
+    to the IP rate but cannot lock everyone else out.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.store = _MemoryThrottleStore()
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config['LOGIN_THROTTLE_ENABLED']
+        self.trust_proxy = config['LOGIN_THROTTLE_TRUST_PROXY']
+        self.limits = {
+            'ip': (config['LOGIN_IP_BURST'], config['LOGIN_IP_PER_MINUTE'] / 60.0),
+            'user': (config['LOGIN_USER_BURST'], config['LOGIN_USER_PER_MINUTE'] / 60.0),
+        }
+        self.lockout_threshold = config['LOGIN_LOCKOUT_THRESHOLD']
+        self.lockout_base = config['LOGIN_LOCKOUT_BASE']
+        self.lockout_max = config['LOGIN_LOCKOUT_MAX']
+        if config['LOGIN_THROTTLE_STORE']:
+            self.store = _SQLiteThrottleStore(config['LOGIN_THROTTLE_STORE'])
+        else:
+            self.store = _MemoryThrottleStore()
+
+    def client_ip(self):
+        if self.trust_proxy and request.access_route:
+            return request.access_route[0]
+        return request.remote_addr or 'unknown'
+
+    def _keys(self, ip, username):
+        return [('ip', f'ip:{ip}'), ('user', f'user:{username.strip().lower()}')]
+
+    def _refill(self, kind, state, now):
+        capacity, rate = self.limits[kind]
+        if state is None:
+            return [float(capacity), now, 0, 0.0]
+        tokens, updated, failures, locked_until = state
+        return [min(float(capacity), tokens + (now - updated) * rate), now, failures, locked_until]
+
+    def acquire(self, ip, username):
+        """Consume one attempt; return 0 if allowed, else seconds until retry."""
+        if not self.enabled:
+            return 0
+        now = time.time()
+        with self.store.transaction() as store:
+            states = {}
+            retry_after = 0.0
+            for kind, key in self._keys(ip, username):
+                state = self._refill(kind, store.get(key), now)
+                states[key] = state
+                if state[3] > now:
+                    retry_after = max(retry_after, state[3] - now)
+                elif state[0] < 1:
+                    retry_after = max(retry_after, (1 - state[0]) / self.limits[kind][1])
+            if retry_after:
+                return retry_after
+            for key, state in states.items():
+                state[0] -= 1
+                store.put(key, tuple(state))
+        return 0
+
+    def record_failure(self, ip, username):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self.store.transaction() as store:
+            key = self._keys(ip, username)[1][1]
+            state = self._refill('user', store.get(key), now)
+            state[2] += 1
+            if state[2] >= self.lockout_threshold:
+                delay = self.lockout_base * 2 ** (state[2] - self.lockout_threshold)
+                state[3] = now + min(delay, self.lockout_max)
+            store.put(key, tuple(state))
+
+    def record_success(self, ip, username):
+        if not self.enabled:
+            return
+        with self.store.transaction() as store:
+            store.delete(self._keys(ip, username)[1][1])
+
+login_throttle = LoginThrottle()
+
+# Background health sampling
+class HealthSampler:
+    """Records system and application metrics into a fixed-size ring buffer.
+
+    Sampling happens on a daemon thread that the first request of each process
+    starts, so every gunicorn worker (including ones forked from a --preload
+    master, which do not inherit threads) keeps its own history. Requests only
+    read the latest sample.
+    """
+
+    HISTORY_FIELDS = ('cpu_percent', 'memory_percent', 'disk_percent', 'db_size_mb',
+                      'wal_size_mb', 'request_rate', 'open_tickets', 'unassigned_tickets')
+
+    def __init__(self):
+        self.interval = 15
+        self.samples = deque(maxlen=240)
+        self._app = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._request_count = 0
+        self._last_count = 0
+        self._last_time = None
+
+    def init_app(self, app):
+        self._app = app
+        self.interval = app.config['HEALTH_SAMPLE_INTERVAL']
+        self.samples = deque(maxlen=app.config['HEALTH_HISTORY_SIZE'])
+        app.before_request(self._on_request)
+
+    def _on_request(self):
+        with self._lock:
+            self._request_count += 1
+        if self.interval > 0 and self._pid != os.getpid():
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._run, name='health-sampler', daemon=True).start()
+
+    def _run(self):
+        psutil = self._psutil()
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)  # prime; the first reading is always 0.0
+        time.sleep(min(self.interval, 1.0))
+        while self._pid == os.getpid():
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Health sampling failed: {e}")
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _psutil():
+        try:
+            import psutil
+            return psutil
+        except ImportError:
+            return None
+
+    def _database_file(self):
+        url = db.engine.url
+        if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+            return url.database
+        return None
+
+    def _system_metrics(self, database_file):
+        psutil = self._psutil()
+        if psutil is None:
+            return {}
+        memory = psutil.virtual_memory()
+        try:
+            disk = psutil.disk_usage(os.path.dirname(os.path.abspath(database_file or self._app.instance_path)))
+        except OSError:
+            disk = None
+        return {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': memory.percent,
+            'memory_used_gb': round(memory.used / (1024**3), 2),
+            'memory_total_gb': round(memory.total / (1024**3), 2),
+            'disk_percent': disk.percent if disk else 0,
+            'disk_used_gb': round(disk.used / (1024**3), 2) if disk else 0,
+            'disk_total_gb': round(disk.total / (1024**3), 2) if disk else 0,
+        }
+
+    @staticmethod
+    def _file_size_mb(path):
+        try:
+            return round(os.path.getsize(path) / (1024**2), 3)
+        except OSError:
+            return 0.0
+
+    def _database_metrics(self):
+        active = Ticket.status.in_(['open', 'in_progress'])
+        try:
+            total, open_count, unassigned, urgent_open = db.session.query(
+                db.func.count(Ticket.id),
+                db.func.sum(db.case((active, 1), else_=0)),
+                db.func.sum(db.case((db.and_(active, Ticket.assigned_to_id.is_(None)), 1), else_=0)),
+                db.func.sum(db.case((db.and_(Ticket.priority == 'urgent', Ticket.status == 'open'), 1), else_=0)),
+            ).one()
+            metrics = {
+                'db_status': 'healthy',
+                'total_tickets': total,
+                'open_tickets': open_count or 0,
+                'unassigned_tickets': unassigned or 0,
+                'urgent_open_tickets': urgent_open or 0,
+                'total_users': db.session.query(db.func.count(User.id)).scalar(),
+                'recent_activity_count': db.session.query(db.func.count(ActivityLog.id)).filter(
+                    ActivityLog.timestamp >= datetime.now(timezone.utc) - timedelta(hours=24)
+                ).scalar(),
+                'total_categories': len(reference_cache.categories()),
+            }
+        except Exception as e:
+            print(f"Health sampling database error: {e}")
+            db.session.rollback()
+            metrics = {'db_status': 'error'}
+        finally:
+            db.session.remove()
+        return metrics
+
+    def sample(self):
+        """Take one sample now, append it to the history and return it."""
+        now = time.monotonic()
+        with self._lock:
+            count = self._request_count
+            elapsed = now - self._last_time if self._last_time else None
+            rate = (count - self._last_count) / elapsed if elapsed else 0.0
+            self._last_count, self._last_time = count, now
+
+        with self._app.app_context():
+            database_file = self._database_file()
+            sample = {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'request_rate': round(rate, 3),
+                'db_size_mb': self._file_size_mb(database_file) if database_file else 0.0,
+                'wal_size_mb': self._file_size_mb(database_file + '-wal') if database_file else 0.0,
+            }
+            sample.update(self._system_metrics(database_file))
+            sample.update(self._database_metrics())
+        with self._lock:
+            self.samples.append(sample)
+        return sample
+
+    def latest(self):
+        with self._lock:
+            return self.samples[-1] if self.samples else None
+
+    def history(self):
+        """The ring buffer as parallel series, oldest first."""
+        with self._lock:
+            samples = list(self.samples)
+        series = {'timestamps': [s['timestamp'] for s in samples]}
+        for field in self.HISTORY_FIELDS:
+            series[field] = [s.get(field, 0) for s in samples]
+        return series
+
+health_sampler = HealthSampler()
+
+# Orphaned upload sweeping
+class UploadSweeper:
+    """Reconciles UPLOAD_FOLDER with Attachment.stored_path in resumable batches.
+
+    A pass starts by streaming the directory once with os.scandir into a name
+    list in the instance folder, then checks the names in UPLOAD_SWEEP_BATCH
+    sized slices with one IN query each, so memory stays bounded and the folder
+    is read only once however many files there are. The offset into the list is
+    saved after every batch, so an interrupted pass resumes where it stopped.
+    Unreferenced files past the grace period are moved to a quarantine folder
+    and deleted once UPLOAD_QUARANTINE_SECONDS have passed, unless an
+    attachment points at them again. Each pass ends by rebuilding storage_usage
+    from the attachments table.
+    """
+
+    QUARANTINE_DIR = '.quarantine'
+
+    def __init__(self):
+        self.interval = 3600
+        self.batch_size = 1000
+        self.grace = 3600
+        self.quarantine_seconds = 7 * 86400
+        self._app = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        self.interval = app.config['UPLOAD_SWEEP_INTERVAL']
+        self.batch_size = app.config['UPLOAD_SWEEP_BATCH']
+        self.grace = app.config['UPLOAD_ORPHAN_GRACE']
+        self.quarantine_seconds = app.config['UPLOAD_QUARANTINE_SECONDS']
+        self.state_path = os.path.join(app.instance_path, 'upload_sweep.json')
+        self.listing_path = os.path.join(app.instance_path, 'upload_sweep.names')
+        app.before_request(self._on_request)
+
+    def _on_request(self):
+        if self.interval > 0 and self._pid != os.getpid():
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._run, name='upload-sweeper', daemon=True).start()
+
+    def _run(self):
+        while self._pid == os.getpid():
+            try:
+                with self._app.app_context():
+                    self.sweep()
+            except Exception as e:
+                print(f"Upload sweep failed: {e}")
+            # Every worker polls, but the lock and completed_at let one pass run per interval
+            time.sleep(min(self.interval, 300))
+
+    def status(self):
+        """The saved cursor and the results of the last completed pass."""
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def sweep(self, force=False):
+        """Run or resume one pass; return its state, or None if not due or already running elsewhere."""
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(self.state_path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return None
+            state = self.status()
+            # cursor is a byte offset into this pass's name list
+            resuming = isinstance(state.get('cursor'), int) and os.path.exists(self.listing_path)
+            if not force and not resuming and time.time() - state.get('completed_at', 0) < self.interval:
+                return None
+            if not self._folder_matches_attachments():
+                print(f"Upload sweep skipped: some attachments are stored outside {current_app.config['UPLOAD_FOLDER']}; "
+                      "update their stored_path before sweeping")
+                return None
+            if not resuming:
+                self._write_listing()
+                state = {'cursor': 0, 'started_at': time.time(), 'scanned': 0, 'quarantined': 0,
+                         'quarantined_bytes': 0, 'completed_at': state.get('completed_at', 0),
+                         'last_pass': state.get('last_pass')}
+                self._save_state(state)
+            with open(self.listing_path, 'rb') as listing:
+                listing.seek(state['cursor'])
+                while True:
+                    batch = self._next_batch(listing)
+                    if not batch:
+                        break
+                    self._reconcile(batch, state)
+                    state['cursor'] = listing.tell()
+                    self._save_state(state)
+            os.remove(self.listing_path)
+            purged, restored = self._purge_quarantine()
+            self.rebuild_usage()
+            finished_at = time.time()
+            state = {
+                'cursor': None,
+                'completed_at': finished_at,
+                'last_pass': {
+                    'started_at': state['started_at'],
+                    'finished_at': finished_at,
+                    'scanned': state['scanned'],
+                    'quarantined': state['quarantined'],
+                    'quarantined_bytes': state['quarantined_bytes'],
+                    'purged': purged,
+                    'restored': restored,
+                },
+            }
+            self._save_state(state)
+            return state
+
+    def _folder_matches_attachments(self):
+        # Files are matched by exact stored_path, so a row written under an older or relative
+        # UPLOAD_FOLDER would make its file look orphaned; refuse to sweep while any exists
+        prefix = os.path.join(current_app.config['UPLOAD_FOLDER'], '')
+        outside = Attachment.query.filter(db.not_(Attachment.stored_path.startswith(prefix, autoescape=True)))
+        return not db.session.query(outside.exists()).scalar()
+
+    def _write_listing(self):
+        tmp_path = self.listing_path + '.tmp'
+        with open(tmp_path, 'wb') as listing, os.scandir(current_app.config['UPLOAD_FOLDER']) as entries:
+            for entry in entries:
+                if not entry.name.startswith('.') and '\n' not in entry.name and entry.is_file(follow_symlinks=False):
+                    listing.write(os.fsencode(entry.name) + b'\n')
+        os.replace(tmp_path, self.listing_path)
+
+    def _next_batch(self, listing):
+        names = []
+        for _ in range(self.batch_size):
+            line = listing.readline()
+            if not line:
+                break
+            names.append(os.fsdecode(line[:-1]))
+        return names
+
+    def _referenced(self, paths):
+        return {path for (path,) in db.session.query(Attachment.stored_path).filter(Attachment.stored_path.in_(paths))}
+
+    def _reconcile(self, names, state):
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        paths = {name: os.path.join(upload_folder, name) for name in names}
+        referenced = self._referenced(list(paths.values()))
+        quarantine = os.path.join(upload_folder, self.QUARANTINE_DIR)
+        cutoff = time.time() - self.grace
+        for name, path in paths.items():
+            state['scanned'] += 1
+            if path in referenced:
+                continue
+            try:
+                stat = os.lstat(path)
+                if stat.st_mtime > cutoff:
+                    continue  # possibly an upload whose commit is still in flight
+                os.makedirs(quarantine, exist_ok=True)
+                target = os.path.join(quarantine, name)
+                os.replace(path, target)
+                os.utime(target)  # the quarantine period starts now
+            except FileNotFoundError:
+                continue  # deleted since the listing was written
+            except OSError as e:
+                print(f"Failed to quarantine {path}: {e}")
+                continue
+            state['quarantined'] += 1
+            state['quarantined_bytes'] += stat.st_size
+
+    def _purge_quarantine(self):
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        quarantine = os.path.join(upload_folder, self.QUARANTINE_DIR)
+        if not os.path.isdir(quarantine):
+            return 0, 0
+        cutoff = time.time() - self.quarantine_seconds
+        purged = restored = 0
+
+        def settle(expired):
+            nonlocal purged, restored
+            originals = {os.path.join(upload_folder, entry.name): entry for entry in expired}
+            referenced = self._referenced(list(originals))
+            for original, entry in originals.items():
+                try:
+                    if original in referenced:
+                        os.replace(entry.path, original)
+                        restored += 1
+                    else:
+                        os.remove(entry.path)
+                        purged += 1
+                except OSError as e:
+                    print(f"Failed to settle quarantined file {entry.path}: {e}")
+
+        expired = []
+        with os.scandir(quarantine) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                        expired.append(entry)
+                except OSError:
+                    continue
+                if len(expired) >= self.batch_size:
+                    settle(expired)
+                    expired = []
+        if expired:
+            settle(expired)
+        return purged, restored
+
+    def rebuild_usage(self):
+        """Recompute storage_usage from the attachments table."""
+        rows = db.session.query(
+            Attachment.ticket_id, db.func.count(Attachment.id), db.func.coalesce(db.func.sum(Attachment.size_bytes), 0)
+        ).group_by(Attachment.ticket_id).all()
+        now = datetime.now(timezone.utc)
+        usage = [{'ticket_id': t, 'file_count': c, 'total_bytes': b, 'updated_at': now} for t, c, b in rows]
+        usage.append({'ticket_id': 0, 'file_count': sum(r[1] for r in rows), 'total_bytes': sum(r[2] for r in rows), 'updated_at': now})
+        StorageUsage.query.delete()
+        db.session.execute(db.insert(StorageUsage), usage)
+        db.session.commit()
+
+    def summary(self, top=5):
+        """Storage totals, the largest tickets and the last pass, without touching the disk."""
+        totals = StorageUsage.query.get(0)
+        largest = (StorageUsage.query.filter(StorageUsage.ticket_id != 0)
+                   .order_by(StorageUsage.total_bytes.desc()).limit(top).all())
+        status = self.status()
+        return {
+            'attachment_count': totals.file_count if totals else 0,
+            'attachment_mb': round(totals.total_bytes / (1024 * 1024), 2) if totals else 0,
+            'largest_tickets': [
+                {'ticket_id': u.ticket_id, 'files': u.file_count, 'mb': round(u.total_bytes / (1024 * 1024), 2)}
+                for u in largest
+            ],
+            'sweep_in_progress': status.get('cursor') is not None,
+            'last_sweep': status.get('last_pass'),
+        }
+
+upload_sweeper = UploadSweeper()
+
+# Automatic ticket assignment
+class AssignmentEngine:
+    """Assigns new tickets to the least loaded technician for their category.
+
+    Each worker keeps every technician's open-ticket count and, per category
+    with auto-assignment enabled, a min-heap keyed by (open tickets, last
+    assignment sequence). Picking a technician is O(log n) and equal loads are
+    served round-robin. Superseded heap entries are skipped lazily. Single
+    ticket changes adjust the counts in place; bulk changes, role and skill
+    edits call invalidate() and the state is rebuilt from one GROUP BY query on
+    next use, as it is periodically to pick up other workers' changes.
+    """
+
+    OPEN_STATUSES = ('open', 'in_progress')
+
+    def __init__(self):
+        self.resync_interval = 60
+        self._signal = InvalidationSignal()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._built_at = None
+        self._state = {}  # technician id -> (open tickets, last assignment sequence)
+        self._members = {}  # category id -> technician ids eligible for it
+        self._categories_of = {}  # technician id -> category ids
+        self._heaps = {}
+        self._sequence = 0
+
+    def init_app(self, app):
+        self.resync_interval = app.config['AUTO_ASSIGN_RESYNC_SECONDS']
+        self._signal = InvalidationSignal(app.config['AUTO_ASSIGN_INVALIDATION_FILE'])
+        self._reset()
+
+    def _rebuild(self):
+        technicians = {u.id for u in reference_cache.staff() if u.role == 'technician'}
+        loads = dict(
+            db.session.query(Ticket.assigned_to_id, db.func.count(Ticket.id))
+            .filter(Ticket.assigned_to_id.in_(technicians), Ticket.status.in_(self.OPEN_STATUSES))
+            .group_by(Ticket.assigned_to_id)
+            .all()
+        )
+        skills = {}
+        for user_id, category_id in db.session.execute(db.select(technician_skill.c.user_id, technician_skill.c.category_id)):
+            if user_id in technicians:
+                skills.setdefault(category_id, set()).add(user_id)
+        enabled = [category_id for (category_id,) in db.session.query(Category.id).filter(Category.auto_assign.is_(True))]
+
+        # Keep assignment sequences so round-robin order survives a rebuild
+        previous = self._state
+        self._state = {t: (loads.get(t, 0), previous.get(t, (0, 0))[1]) for t in technicians}
+        # Categories without explicit skills fall back to every technician
+        self._members = {c: skills.get(c) or set(technicians) for c in enabled}
+        self._categories_of = {}
+        for category_id, members in self._members.items():
+            for tech_id in members:
+                self._categories_of.setdefault(tech_id, []).append(category_id)
+        self._heaps = {c: self._heap_for(members) for c, members in self._members.items()}
+        self._built_at = time.monotonic()
+
+    def _heap_for(self, members):
+        heap = [(*self._state[t], t) for t in members]
+        heapq.heapify(heap)
+        return heap
+
+    def _sync(self):
+        changed = self._signal.changed()
+        if changed or self._built_at is None or time.monotonic() - self._built_at > self.resync_interval:
+            self._rebuild()
+
+    def _set(self, tech_id, load, sequence):
+        self._state[tech_id] = (load, sequence)
+        for category_id in self._categories_of.get(tech_id, ()):
+            heap = self._heaps[category_id]
+            heapq.heappush(heap, (load, sequence, tech_id))
+            # Compact once superseded entries outnumber live ones
+            if len(heap) > 2 * len(self._members[category_id]) + 16:
+                self._heaps[category_id] = self._heap_for(self._members[category_id])
+
+    def pick(self, category_id):
+        """Reserve the technician a new ticket in this category goes to, or None.
+
+        The reservation counts towards the technician's load immediately; call
+        release() if the ticket is not committed.
+        """
+        if category_id is None:
+            return None
+        with self._lock:
+            self._sync()
+            heap = self._heaps.get(category_id)
+            while heap:
+                load, sequence, tech_id = heap[0]
+                if self._state.get(tech_id) == (load, sequence):
+                    self._sequence = max(self._sequence, sequence) + 1
+                    self._set(tech_id, load + 1, self._sequence)
+                    return tech_id
+                heapq.heappop(heap)
+        return None
+
+    def release(self, tech_id):
+        """Give back a pick() reservation whose ticket was never committed."""
+        self.ticket_changed(tech_id, 'open', None, None)
+
+    def ticket_changed(self, old_assignee, old_status, new_assignee, new_status):
+        """Move one open ticket between technician loads after a committed update."""
+        old_owner = old_assignee if old_status in self.OPEN_STATUSES else None
+        new_owner = new_assignee if new_status in self.OPEN_STATUSES else None
+        if old_owner == new_owner:
+            return
+        with self._lock:
+            for tech_id, delta in ((old_owner, -1), (new_owner, 1)):
+                state = self._state.get(tech_id)
+                if state is not None:
+                    self._set(tech_id, max(0, state[0] + delta), state[1])
+
+    def invalidate(self):
+        """Rebuild from the database here and, through the signal, in every worker.
+
+        Only for structural changes (roles, skills, bulk edits). Other workers'
+        single-ticket load changes are picked up by the periodic resync, so
+        one new ticket never forces a full rebuild everywhere.
+        """
+        with self._lock:
+            self._built_at = None
+        self._signal.fire()
+
+assignment_engine = AssignmentEngine()
+
+# Duplicate ticket detection
+class DuplicateIndex:
+    """MinHash/LSH index over the text of open tickets that are not duplicates.
+
+    Text is reduced to character shingles and a one-permutation MinHash
+    signature, which is split into bands and bucketed, so a lookup compares only
+    tickets that share a band instead of every open ticket. Writes in this
+    worker update the index directly; every DUPLICATE_INDEX_RESYNC_SECONDS the
+    indexed ids are reconciled with the open ticket ids to pick up changes from
+    other workers, hashing only tickets that are new to the index.
+    """
+
+    SHINGLE_SIZE = 5
+    BANDS = 16
+    ROWS = 4
+    MAX_TEXT = 600  # title plus the start of the description
+
+    def __init__(self):
+        self.threshold = 0.5
+        self.resync_interval = 30
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._entries = {}  # ticket id -> (signature, title)
+        self._buckets = {}  # (band, band values) -> ticket ids
+        self._synced_at = None
+
+    def init_app(self, app):
+        self.threshold = app.config['DUPLICATE_THRESHOLD']
+        self.resync_interval = app.config['DUPLICATE_INDEX_RESYNC_SECONDS']
+        self._reset()
+
+    def signature(self, title, description=''):
+        text = ' '.join(re.findall(r'[a-z0-9]+', f'{title} {description or ""}'.lower()))[:self.MAX_TEXT]
+        if not text:
+            return None
+        k = self.SHINGLE_SIZE
+        size = self.BANDS * self.ROWS
+        bins = [None] * size
+        for shingle in {text[i:i + k] for i in range(max(1, len(text) - k + 1))}:
+            h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+            slot, value = h % size, h // size
+            if bins[slot] is None or value < bins[slot]:
+                bins[slot] = value
+        # Empty bins (short texts) borrow the next filled bin, tagged with the distance
+        signature = []
+        for i in range(size):
+            for offset in range(size):
+                value = bins[(i + offset) % size]
+                if value is not None:
+                    signature.append((value, offset))
+                    break
+        return tuple(signature)
+
+    def _band_keys(self, signature):
+        rows = self.ROWS
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.BANDS)]
+
+    def _add(self, ticket_id, title, signature):
+        self._remove(ticket_id)
+        self._entries[ticket_id] = (signature, title)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(ticket_id)
+
+    def _remove(self, ticket_id):
+        entry = self._entries.pop(ticket_id, None)
+        if entry is None:
+            return
+        for key in self._band_keys(entry[0]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(ticket_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _sync(self):
+        if self._synced_at is not None and time.monotonic() - self._synced_at < self.resync_interval:
+            return
+        open_ids = {
+            ticket_id for (ticket_id,) in db.session.query(Ticket.id)
+            .filter(Ticket.status.in_(['open', 'in_progress']), Ticket.parent_id.is_(None))
+        }
+        for ticket_id in set(self._entries) - open_ids:
+            self._remove(ticket_id)
+        missing = sorted(open_ids - set(self._entries))
+        for start in range(0, len(missing), 500):
+            rows = db.session.query(Ticket.id, Ticket.title, Ticket.description).filter(Ticket.id.in_(missing[start:start + 500]))
+            for ticket_id, title, description in rows:
+                signature = self.signature(title, description)
+                if signature:
+                    self._add(ticket_id, title, signature)
+        self._synced_at = time.monotonic()
+
+    def similar(self, title, description='', limit=5, exclude=None):
+        """Open tickets whose estimated similarity reaches the threshold, best first."""
+        signature = self.signature(title, description)
+        if signature is None:
+            return []
+        with self._lock:
+            self._sync()
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            candidates.discard(exclude)
+            matches = []
+            for ticket_id in candidates:
+                other, other_title = self._entries[ticket_id]
+                score = sum(a == b for a, b in zip(signature, other)) / len(signature)
+                if score >= self.threshold:
+                    matches.append({'id': ticket_id, 'title': other_title, 'score': round(score, 2)})
+        matches.sort(key=lambda m: (-m['score'], -m['id']))
+        return matches[:limit]
+
+    def update(self, ticket):
+        """Index or drop a ticket after a committed change."""
+        with self._lock:
+            if ticket.status in ('open', 'in_progress') and ticket.parent_id is None:
+                if ticket.id not in self._entries:
+                    signature = self.signature(ticket.title, ticket.description)
+                    if signature:
+                        self._add(ticket.id, ticket.title, signature)
+            else:
+                self._remove(ticket.id)
+
+    def remove(self, *ticket_ids):
+        with self._lock:
+            for ticket_id in ticket_ids:
+                self._remove(ticket_id)
+
+duplicate_index = DuplicateIndex()
+
 # Routes
-@app.route('/')
+@bp.route('/')
 def index():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     return render_template('index.html')
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         username = request.form['username']
@@ -244,36 +1733,50 @@ def register():
         
         db.session.add(user)
         db.session.commit()
+        if role != 'user':
+            reference_cache.invalidate('staff', 'admins')
         
         flash('Registration successful! Please log in.')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     return render_template('register.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
         
+        # Reject throttled clients before paying for a password hash
+        client_ip = login_throttle.client_ip()
+        retry_after = login_throttle.acquire(client_ip, username)
+        if retry_after:
+            flash(f'Too many login attempts. Please try again in {math.ceil(retry_after)} seconds.')
+            return render_template('login.html'), 429, {'Retry-After': str(math.ceil(retry_after))}
+        
         user = User.query.filter_by(username=username).first()
         
         if user and user.check_password(password):
+            login_throttle.record_success(client_ip, username)
+            if user.needs_rehash():
+                user.set_password(password)
+                db.session.commit()
             login_user(user)
             next_page = request.args.get('next')
-            return redirect(next_page) if next_page else redirect(url_for('dashboard'))
+            return redirect(next_page) if next_page else redirect(url_for('main.dashboard'))
         else:
+            login_throttle.record_failure(client_ip, username)
             flash('Invalid username or password')
     
     return render_template('login.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @login_required
 def dashboard():
     # Get tickets based on user role
@@ -302,11 +1805,13 @@ def dashboard():
 
     return render_template('dashboard.html', 
                          tickets=tickets, 
+                         technicians=reference_cache.staff() if current_user.is_technician() else [],
+                         categories=reference_cache.categories() if current_user.is_technician() else [],
                          total_tickets=total_tickets,
                          open_tickets=open_tickets,
                          closed_tickets=closed_tickets)
 
-@app.route('/create_ticket', methods=['GET', 'POST'])
+@bp.route('/create_ticket', methods=['GET', 'POST'])
 @login_required
 def create_ticket():
     if request.method == 'POST':
@@ -314,24 +1819,77 @@ def create_ticket():
         description = request.form['description']
         priority = request.form['priority']
         category_id = request.form.get('category_id')
+        if category_id and (not category_id.isdigit() or int(category_id) not in {c.id for c in reference_cache.categories()}):
+            flash('Invalid category.')
+            return redirect(url_for('main.create_ticket'))
         
         ticket = Ticket(
             title=title,
             description=description,
             priority=priority,
-            category_id=category_id if category_id else None,
+            category_id=int(category_id) if category_id else None,
             created_by_id=current_user.id
         )
         
-        db.session.add(ticket)
-        db.session.commit()
+        # Link to the incident the user picked, or to a close enough open match
+        parent = None
+        parent_id = request.form.get('parent_id', '')
+        auto_link_threshold = current_app.config['DUPLICATE_AUTO_LINK_THRESHOLD']
+        if parent_id.isdigit():
+            parent = Ticket.query.get(int(parent_id))
+            if parent is not None and not current_user.is_technician() and parent.created_by_id != current_user.id:
+                parent = None
+        elif auto_link_threshold:
+            matches = duplicate_index.similar(title, description, limit=1)
+            if matches and matches[0]['score'] >= auto_link_threshold:
+                parent = Ticket.query.get(matches[0]['id'])
+        if parent is not None and parent.parent_id:
+            parent = parent.parent
+        if parent is not None and not parent.is_sla_active():
+            parent = None
         
-        # Log activity
-        log_activity(ticket.id, 'Created', f'Ticket created by {current_user.username}')
+        if parent is not None:
+            # Duplicates go to whoever already handles the incident
+            ticket.parent_id = parent.id
+            ticket.assigned_to_id = parent.assigned_to_id
+        else:
+            ticket.assigned_to_id = assignment_engine.pick(ticket.category_id)
+        reserved_for = ticket.assigned_to_id if parent is None else None
+        
+        try:
+            with activity_unit_of_work():
+                db.session.add(ticket)
+                db.session.flush()  # assigns ticket.id for the log entry
+                log_activity(ticket.id, 'Created', f'Ticket created by {current_user.username}')
+                if parent is not None:
+                    log_activity(ticket.id, 'Linked', f'Linked to incident #{parent.id}')
+                    log_activity(parent.id, 'Duplicate Linked', f'Ticket #{ticket.id} from {current_user.username} linked as a duplicate')
+                elif ticket.assigned_to_id:
+                    assignee_name = {u.id: u.username for u in reference_cache.staff()}.get(ticket.assigned_to_id)
+                    log_activity(ticket.id, 'Assignment Changed', f'Ticket auto-assigned to {assignee_name}')
+        except Exception:
+            if reserved_for:
+                assignment_engine.release(reserved_for)
+            raise
+        if parent is not None:
+            assignment_engine.ticket_changed(None, None, ticket.assigned_to_id, 'open')
+        duplicate_index.update(ticket)
         
-        # Send notification to technicians and admins
-        technicians = User.query.filter(User.role.in_(['admin', 'technician'])).all()
-        for tech in technicians:
+        if parent is not None and parent.assignee:
+            # One note to the incident's assignee instead of a mail to all staff
+            if parent.assignee.id != current_user.id:
+                send_notification_email(
+                    parent.assignee.email,
+                    f'Duplicate Linked: {parent.title}',
+                    f'{current_user.username} reported the same issue as incident #{parent.id}.\n\n'
+                    f'Title: {title}\n'
+                    f'Description: {description}'
+                )
+            flash(f'Ticket created and linked to existing incident #{parent.id}.')
+            return redirect(url_for('main.dashboard'))
+        
+        # Send notification to technicians and admins (also for duplicates of an unassigned incident)
+        for tech in reference_cache.staff():
             send_notification_email(
                 tech.email,
                 f'New Ticket Created: {title}',
@@ -342,13 +1900,37 @@ def create_ticket():
                 f'Please log in to view and manage this ticket.'
             )
         
-        flash('Ticket created successfully!')
-        return redirect(url_for('dashboard'))
+        if parent is not None:
+            flash(f'Ticket created and linked to existing incident #{parent.id}.')
+        else:
+            flash('Ticket created successfully!')
+        return redirect(url_for('main.dashboard'))
     
-    categories = Category.query.all()
-    return render_template('create_ticket.html', categories=categories)
+    return render_template('create_ticket.html', categories=reference_cache.categories())
 
-@app.route('/ticket/<int:ticket_id>')
+@bp.route('/tickets/similar')
+@login_required
+def similar_tickets():
+    """Likely duplicates of the text being typed into the new-ticket form."""
+    title = request.args.get('title', '')
+    description = request.args.get('description', '')
+    if len(title.strip()) + len(description.strip()) < 10:
+        return jsonify({'matches': []})
+    if current_user.is_technician():
+        matches = duplicate_index.similar(title, description)
+        others = 0
+    else:
+        # Other people's titles can carry patient details: users only see their own tickets, plus a count
+        matches = duplicate_index.similar(title, description, limit=None)
+        own = {ticket_id for (ticket_id,) in db.session.query(Ticket.id).filter(
+            Ticket.id.in_([m['id'] for m in matches]), Ticket.created_by_id == current_user.id)}
+        others = sum(1 for m in matches if m['id'] not in own)
+        matches = [m for m in matches if m['id'] in own][:5]
+    for match in matches:
+        match['url'] = url_for('main.view_ticket', ticket_id=match['id'])
+    return jsonify({'matches': matches, 'others': others})
+
+@bp.route('/ticket/<int:ticket_id>')
 @login_required
 def view_ticket(ticket_id):
     try:
@@ -357,7 +1939,7 @@ def view_ticket(ticket_id):
         # Check permissions
         if not current_user.is_technician() and ticket.created_by_id != current_user.id:
             flash('You do not have permission to view this ticket.')
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('main.dashboard'))
 
         activity_logs = ticket.activity_logs.order_by(ActivityLog.timestamp.desc()).all()
 
@@ -382,14 +1964,11 @@ def view_ticket(ticket_id):
             print(f"Attachments fetch failed for ticket {ticket_id}: {e}")
             attachments = []
 
-        technicians = User.query.filter(User.role.in_(['admin', 'technician'])).all()
-        categories = Category.query.all()
-
         return render_template('view_ticket.html',
                                ticket=ticket,
                                activity_logs=activity_logs,
-                               technicians=technicians,
-                               categories=categories,
+                               technicians=reference_cache.staff(),
+                               categories=reference_cache.categories(),
                                attachments=attachments,
                                sla_due_at_iso=sla_due_at_iso,
                                sla_due_at_display=sla_due_at_display,
@@ -397,7 +1976,7 @@ def view_ticket(ticket_id):
     except Exception:
         raise
 
-@app.route('/update_ticket/<int:ticket_id>', methods=['POST'])
+@bp.route('/update_ticket/<int:ticket_id>', methods=['POST'])
 @login_required
 def update_ticket(ticket_id):
     ticket = Ticket.query.get_or_404(ticket_id)
@@ -405,43 +1984,49 @@ def update_ticket(ticket_id):
     # Check permissions
     if not current_user.is_technician() and ticket.created_by_id != current_user.id:
         flash('You do not have permission to update this ticket.')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     old_status = ticket.status
-    old_assignee = ticket.assignee
+    old_assigned_to_id = ticket.assigned_to_id
     old_priority = ticket.priority
     
-    # Update ticket fields
-    if 'status' in request.form:
-        ticket.status = request.form['status']
-    
-    if 'priority' in request.form and current_user.is_technician():
-        ticket.priority = request.form['priority']
-    
-    if 'assigned_to_id' in request.form and current_user.is_technician():
-        assigned_to_id = request.form['assigned_to_id']
-        ticket.assigned_to_id = int(assigned_to_id) if assigned_to_id else None
-    
-    if 'category_id' in request.form and current_user.is_technician():
-        category_id = request.form['category_id']
-        ticket.category_id = int(category_id) if category_id else None
-    
-    db.session.commit()
-    
-    # Log changes
+    # Ticket change and its log entries are written in one commit
     changes = []
-    if old_status != ticket.status:
-        changes.append(f'Status changed from {old_status} to {ticket.status}')
-        log_activity(ticket.id, 'Status Changed', f'Status updated to {ticket.status} by {current_user.username}')
-    
-    if old_assignee != ticket.assignee:
-        assignee_name = ticket.assignee.username if ticket.assignee else 'Unassigned'
-        changes.append(f'Assigned to {assignee_name}')
-        log_activity(ticket.id, 'Assignment Changed', f'Ticket assigned to {assignee_name} by {current_user.username}')
-    
-    if old_priority != ticket.priority:
-        changes.append(f'Priority changed to {ticket.priority}')
-        log_activity(ticket.id, 'Priority Changed', f'Priority updated to {ticket.priority} by {current_user.username}')
+    with activity_unit_of_work():
+        # Update ticket fields
+        if 'status' in request.form:
+            ticket.status = request.form['status']
+        
+        if 'priority' in request.form and current_user.is_technician():
+            ticket.priority = request.form['priority']
+        
+        if 'assigned_to_id' in request.form and current_user.is_technician():
+            assigned_to_id = request.form['assigned_to_id']
+            ticket.assigned_to_id = int(assigned_to_id) if assigned_to_id else None
+        
+        if 'category_id' in request.form and current_user.is_technician():
+            category_id = request.form['category_id']
+            ticket.category_id = int(category_id) if category_id else None
+        
+        db.session.flush()
+        # Reload the assignee relationship to reflect the new assigned_to_id
+        db.session.expire(ticket, ['assignee'])
+        
+        # Log changes
+        if old_status != ticket.status:
+            changes.append(f'Status changed from {old_status} to {ticket.status}')
+            log_activity(ticket.id, 'Status Changed', f'Status updated to {ticket.status} by {current_user.username}')
+        
+        if old_assigned_to_id != ticket.assigned_to_id:
+            assignee_name = ticket.assignee.username if ticket.assignee else 'Unassigned'
+            changes.append(f'Assigned to {assignee_name}')
+            log_activity(ticket.id, 'Assignment Changed', f'Ticket assigned to {assignee_name} by {current_user.username}')
+        
+        if old_priority != ticket.priority:
+            changes.append(f'Priority changed to {ticket.priority}')
+            log_activity(ticket.id, 'Priority Changed', f'Priority updated to {ticket.priority} by {current_user.username}')
+    assignment_engine.ticket_changed(old_assigned_to_id, old_status, ticket.assigned_to_id, ticket.status)
+    duplicate_index.update(ticket)
     
     # Send notifications for significant changes
     if changes:
@@ -468,9 +2053,143 @@ def update_ticket(ticket_id):
             )
     
     flash('Ticket updated successfully!')
-    return redirect(url_for('view_ticket', ticket_id=ticket_id))
+    return redirect(url_for('main.view_ticket', ticket_id=ticket_id))
+
+BULK_ACTIONS = {'assign', 'priority', 'category', 'close'}
+
+@bp.route('/tickets/bulk_update', methods=['POST'])
+@login_required
+def bulk_update_tickets():
+    """Apply one change to many tickets with set-based UPDATEs in a single commit.
+
+    Accepts a form post (ticket_ids, action, value) or the same keys as JSON.
+    """
+    payload = request.get_json(silent=True) if request.is_json else None
+
+    def respond(message, status=200, **extra):
+        if payload is not None:
+            body = {'message': message, **extra}
+            if status >= 400:
+                body = {'error': message}
+            return jsonify(body), status
+        flash(message)
+        return redirect(url_for('main.dashboard'))
+
+    if not current_user.is_technician():
+        return respond('You do not have permission to bulk update tickets.', 403)
+
+    if payload is not None:
+        if not isinstance(payload, dict):
+            return respond('Expected a JSON object.', 400)
+        raw_ids = payload.get('ticket_ids') or []
+        if not isinstance(raw_ids, list):
+            return respond('ticket_ids must be a list.', 400)
+        action = payload.get('action')
+        value = payload.get('value')
+    else:
+        raw_ids = request.form.getlist('ticket_ids')
+        action = request.form.get('action')
+        value = request.form.get('value')
+
+    try:
+        ticket_ids = sorted({int(t) for t in raw_ids})
+    except (TypeError, ValueError):
+        return respond('Invalid ticket selection.', 400)
+    if not ticket_ids:
+        return respond('No tickets selected.', 400)
+    if action not in BULK_ACTIONS:
+        return respond('Invalid bulk action.', 400)
+
+    value = '' if value is None else str(value)
+    staff = {u.id: u for u in reference_cache.staff()}
+    if action == 'assign':
+        if value and (not value.isdigit() or int(value) not in staff):
+            return respond('Invalid assignee.', 400)
+        field, new_value = 'assigned_to_id', int(value) if value else None
+    elif action == 'priority':
+        if value not in ['low', 'medium', 'high', 'urgent']:
+            return respond('Invalid priority.', 400)
+        field, new_value = 'priority', value
+    elif action == 'category':
+        category_ids = {c.id for c in reference_cache.categories()}
+        if value and (not value.isdigit() or int(value) not in category_ids):
+            return respond('Invalid category.', 400)
+        field, new_value = 'category_id', int(value) if value else None
+    else:
+        field, new_value = 'status', 'closed'
+
+    # One SELECT for the current state of every targeted ticket
+    rows = db.session.query(
+        Ticket.id, Ticket.title, Ticket.created_by_id, getattr(Ticket, field)
+    ).filter(Ticket.id.in_(ticket_ids)).all()
+    changed = [r for r in rows if r[3] != new_value]
+    if not changed:
+        return respond('No tickets needed updating.', updated=0, ticket_ids=[])
+    changed_ids = [r.id for r in changed]
+
+    if action == 'assign':
+        assignee_name = staff[new_value].username if new_value else 'Unassigned'
+        log_action = 'Assignment Changed'
+        log_description = f'Ticket assigned to {assignee_name} by {current_user.username}'
+        change_text = f'Assigned to {assignee_name}'
+    elif action == 'priority':
+        log_action = 'Priority Changed'
+        log_description = f'Priority updated to {new_value} by {current_user.username}'
+        change_text = f'Priority changed to {new_value}'
+    elif action == 'category':
+        category_names = {c.id: c.name for c in reference_cache.categories()}
+        category_name = category_names.get(new_value, 'None')
+        log_action = 'Category Changed'
+        log_description = f'Category changed to {category_name} by {current_user.username}'
+        change_text = f'Category changed to {category_name}'
+    else:
+        log_action = 'Status Changed'
+        log_description = f'Status updated to closed by {current_user.username}'
+        change_text = 'Status changed to closed'
+
+    now = datetime.now(timezone.utc)
+    with activity_unit_of_work():
+        Ticket.query.filter(Ticket.id.in_(changed_ids)).update(
+            {field: new_value, 'updated_at': now}, synchronize_session=False
+        )
+        db.session.execute(db.insert(ActivityLog), [
+            {
+                'ticket_id': ticket_id,
+                'action': log_action,
+                'description': log_description,
+                'user_id': current_user.id,
+                'timestamp': now,
+            }
+            for ticket_id in changed_ids
+        ])
+    if action in ('assign', 'close'):
+        assignment_engine.invalidate()
+    if action == 'close':
+        duplicate_index.remove(*changed_ids)
+
+    # One consolidated notification per affected user
+    pending = {}
+    for r in changed:
+        if r.created_by_id != current_user.id:
+            pending.setdefault(r.created_by_id, []).append(r)
+        if action == 'assign' and new_value and new_value != current_user.id:
+            pending.setdefault(new_value, []).append(r)
+    if pending:
+        recipients = User.query.filter(User.id.in_(list(pending))).all()
+        for user in recipients:
+            lines = '\n'.join(f'#{r.id} {r.title}' for r in pending[user.id])
+            send_notification_email(
+                user.email,
+                f'{len(pending[user.id])} ticket(s) updated',
+                f'The following tickets have been updated.\n\n'
+                f'Change: {change_text}\n\n'
+                f'{lines}\n\n'
+                f'Updated by: {current_user.username}'
+            )
+
+    return respond(f'{len(changed_ids)} ticket(s) updated.', updated=len(changed_ids), ticket_ids=changed_ids)
 
-@app.route('/ticket/<int:ticket_id>/upload', methods=['POST'])
+@bp.route('/ticket/<int:ticket_id>/upload', methods=['POST'])
 @login_required
 def upload_attachment(ticket_id):
     ticket = Ticket.query.get_or_404(ticket_id)
@@ -478,16 +2197,16 @@ def upload_attachment(ticket_id):
     # Permission check
     if not current_user.is_technician() and ticket.created_by_id != current_user.id:
         flash('You do not have permission to upload to this ticket.')
-        return redirect(url_for('view_ticket', ticket_id=ticket_id))
+        return redirect(url_for('main.view_ticket', ticket_id=ticket_id))
 
     if 'file' not in request.files:
         flash('No file part')
-        return redirect(url_for('view_ticket', ticket_id=ticket_id))
+        return redirect(url_for('main.view_ticket', ticket_id=ticket_id))
 
     file = request.files['file']
     if file.filename == '':
         flash('No selected file')
-        return redirect(url_for('view_ticket', ticket_id=ticket_id))
+        return redirect(url_for('main.view_ticket', ticket_id=ticket_id))
 
     if file and allowed_file(file.filename):
         from werkzeug.utils import secure_filename
@@ -495,7 +2214,7 @@ def upload_attachment(ticket_id):
         # Prefix with ticket and timestamp for uniqueness
         ts = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
         stored_name = f"t{ticket.id}_{ts}_{safe_name}"
-        stored_path = os.path.join(app.config['UPLOAD_FOLDER'], stored_name)
+        stored_path = os.path.join(current_app.config['UPLOAD_FOLDER'], stored_name)
         file.save(stored_path)
 
         att = Attachment(
@@ -506,17 +2225,25 @@ def upload_attachment(ticket_id):
             ticket_id=ticket.id,
             uploaded_by_id=current_user.id,
         )
-        db.session.add(att)
-        db.session.commit()
-
-        log_activity(ticket.id, 'Attachment Uploaded', f'{current_user.username} uploaded {safe_name}')
+        try:
+            with activity_unit_of_work():
+                db.session.add(att)
+                adjust_storage_usage(ticket.id, 1, att.size_bytes)
+                log_activity(ticket.id, 'Attachment Uploaded', f'{current_user.username} uploaded {safe_name}')
+        except Exception:
+            # Don't leave a file behind that no attachment row points to
+            try:
+                os.remove(stored_path)
+            except OSError as e:
+                print(f"Failed to remove file: {e}")
+            raise
         flash('File uploaded successfully.')
     else:
         flash('Invalid file type. Allowed: png, jpg, jpeg, gif, pdf, txt, log')
 
-    return redirect(url_for('view_ticket', ticket_id=ticket_id))
+    return redirect(url_for('main.view_ticket', ticket_id=ticket_id))
 
-@app.route('/attachments/<int:attachment_id>/download')
+@bp.route('/attachments/<int:attachment_id>/download')
 @login_required
 def download_attachment(attachment_id):
     att = Attachment.query.get_or_404(attachment_id)
@@ -524,13 +2251,13 @@ def download_attachment(attachment_id):
     # Permission check: ticket creator or technician
     if not current_user.is_technician() and att.ticket.created_by_id != current_user.id:
         flash('You do not have permission to download this file.')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
     directory = os.path.dirname(att.stored_path)
     filename = os.path.basename(att.stored_path)
     return send_from_directory(directory, filename, as_attachment=True, download_name=att.filename)
 
-@app.route('/attachments/<int:attachment_id>/delete', methods=['POST'])
+@bp.route('/attachments/<int:attachment_id>/delete', methods=['POST'])
 @login_required
 def delete_attachment(attachment_id):
     att = Attachment.query.get_or_404(attachment_id)
@@ -539,21 +2266,23 @@ def delete_attachment(attachment_id):
     # Permission: technician/admin or ticket owner
     if not current_user.is_technician() and ticket.created_by_id != current_user.id:
         flash('You do not have permission to delete this file.')
-        return redirect(url_for('view_ticket', ticket_id=ticket.id))
+        return redirect(url_for('main.view_ticket', ticket_id=ticket.id))
 
+    with activity_unit_of_work():
+        db.session.delete(att)
+        adjust_storage_usage(ticket.id, -1, -(att.size_bytes or 0))
+        log_activity(ticket.id, 'Attachment Deleted', f'{current_user.username} deleted {att.filename}')
+
+    # Remove the file only once the row is gone; a leftover is picked up by the sweeper
     try:
         if os.path.exists(att.stored_path):
             os.remove(att.stored_path)
     except Exception as e:
         print(f"Failed to remove file: {e}")
-
-    db.session.delete(att)
-    db.session.commit()
-    log_activity(ticket.id, 'Attachment Deleted', f'{current_user.username} deleted {att.filename}')
     flash('Attachment deleted.')
-    return redirect(url_for('view_ticket', ticket_id=ticket.id))
+    return redirect(url_for('main.view_ticket', ticket_id=ticket.id))
 
-@app.route('/add_comment/<int:ticket_id>', methods=['POST'])
+@bp.route('/add_comment/<int:ticket_id>', methods=['POST'])
 @login_required
 def add_comment(ticket_id):
     ticket = Ticket.query.get_or_404(ticket_id)
@@ -562,7 +2291,7 @@ def add_comment(ticket_id):
     # Check permissions
     if not current_user.is_technician() and ticket.created_by_id != current_user.id:
         flash('You do not have permission to comment on this ticket.')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     # Log comment as activity
     log_activity(ticket.id, 'Comment Added', f'{current_user.username}: {comment}')
@@ -584,147 +2313,141 @@ def add_comment(ticket_id):
         )
     
     flash('Comment added successfully!')
-    return redirect(url_for('view_ticket', ticket_id=ticket_id))
+    return redirect(url_for('main.view_ticket', ticket_id=ticket_id))
 
-@app.route('/admin')
+@bp.route('/admin')
 @login_required
 def admin_panel():
     if not current_user.is_admin():
         flash('Access denied. Admin privileges required.')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     users = User.query.all()
-    categories = Category.query.all()
-
-    # Basic analytics for charts (JSON endpoints also available if needed)
-    priority_counts = {
-        'urgent': Ticket.query.filter_by(priority='urgent').count(),
-        'high': Ticket.query.filter_by(priority='high').count(),
-        'medium': Ticket.query.filter_by(priority='medium').count(),
-        'low': Ticket.query.filter_by(priority='low').count(),
-    }
-    status_counts = {
-        'open': Ticket.query.filter_by(status='open').count(),
-        'in_progress': Ticket.query.filter_by(status='in_progress').count(),
-        'resolved': Ticket.query.filter_by(status='resolved').count(),
-        'closed': Ticket.query.filter_by(status='closed').count(),
-    }
-    return render_template('admin.html', users=users, categories=categories, priority_counts=priority_counts, status_counts=status_counts)
+    categories = Category.query.options(db.selectinload(Category.technicians)).all()
 
-@app.route('/admin/analytics')
+    # Basic analytics for charts and category widgets (JSON endpoints also available if needed)
+    stats = ticket_statistics()
+    return render_template('admin.html', users=users, categories=categories,
+                           priority_counts=stats['priority'], status_counts=stats['status'],
+                           category_counts=stats['by_category'])
+
+@bp.route('/admin/analytics')
 @login_required
 def admin_analytics():
     if not current_user.is_admin():
         return jsonify({'error': 'Access denied'}), 403
 
     try:
-        range_param = request.args.get('range', 'week')
-        days = 7 if range_param == 'week' else 30
-        start_at = datetime.now(timezone.utc) - timedelta(days=days)
-
-        # Ticket volume by day
-        tickets_in_range = Ticket.query.filter(Ticket.created_at >= start_at).all()
-        by_day = {}
-        for t in tickets_in_range:
-            day_str = t.created_at.date().isoformat()
-            by_day[day_str] = by_day.get(day_str, 0) + 1
-        # Fill missing days
-        labels = []
-        counts = []
-        for i in range(days, -1, -1):
-            d = (datetime.now(timezone.utc) - timedelta(days=i)).date().isoformat()
-            labels.append(d)
-            counts.append(by_day.get(d, 0))
-
-        # Category counts in range
-        category_stats = []
-        for c in Category.query.all():
-            count = Ticket.query.filter(Ticket.category_id == c.id, Ticket.created_at >= start_at).count()
-            category_stats.append({'name': c.name, 'count': count})
-
-        # Avg resolution time (tickets resolved/closed in range by update time)
-        done = Ticket.query.filter(Ticket.status.in_(['resolved', 'closed']), Ticket.updated_at >= start_at).all()
-        avg_resolution_hours = 0
-        res_by_day_sum = {}
-        res_by_day_count = {}
-        if done:
-            total_hours = 0
-            for t in done:
-                hours = max(0, (t.updated_at - t.created_at).total_seconds()) / 3600
-                total_hours += hours
-                day_key = t.updated_at.date().isoformat()
-                res_by_day_sum[day_key] = res_by_day_sum.get(day_key, 0) + hours
-                res_by_day_count[day_key] = res_by_day_count.get(day_key, 0) + 1
-            avg_resolution_hours = total_hours / len(done)
-
-        # Technician performance (tickets resolved/closed in range)
-        tech_perf = {}
-        for t in done:
-            tech_id = t.assigned_to_id
-            if tech_id is None:
-                continue
-            if tech_id not in tech_perf:
-                u = User.query.get(tech_id)
-                tech_perf[tech_id] = {
-                    'user_id': tech_id,
-                    'username': (u.username if u else f'User {tech_id}'),
-                    'closed_count': 0,
-                    'total_hours': 0.0,
-                }
-            tech_perf[tech_id]['closed_count'] += 1
-            tech_perf[tech_id]['total_hours'] += max(0, (t.updated_at - t.created_at).total_seconds()) / 3600
-
-        tech_list = []
-        for v in tech_perf.values():
-            avg_h = v['total_hours'] / v['closed_count'] if v['closed_count'] else 0
-            tech_list.append({
-                'username': v['username'],
-                'closed_count': v['closed_count'],
-                'avg_resolution_hours': avg_h,
-            })
-
-        # SLA breaches by day (based on ActivityLog 'SLA Escalated')
-        sla_logs = ActivityLog.query.filter(
-            ActivityLog.action == 'SLA Escalated',
-            ActivityLog.timestamp >= start_at
-        ).all()
-        sla_by_day = {}
-        for log in sla_logs:
-            day_key = log.timestamp.date().isoformat()
-            sla_by_day[day_key] = sla_by_day.get(day_key, 0) + 1
-
-        # Build aligned day labels for trend series
-        trend_labels = []
-        res_avg_series = []
-        sla_counts_series = []
-        for i in range(days, -1, -1):
-            day = (datetime.now(timezone.utc) - timedelta(days=i)).date().isoformat()
-            trend_labels.append(day)
-            # average resolution hours that day
-            if res_by_day_count.get(day, 0) > 0:
-                res_avg_series.append(round(res_by_day_sum.get(day, 0) / res_by_day_count.get(day, 1), 2))
-            else:
-                res_avg_series.append(0)
-            sla_counts_series.append(sla_by_day.get(day, 0))
-
-        return jsonify({
-            'range': range_param,
-            'volume_by_day': { 'labels': labels, 'counts': counts },
-            'category_counts': category_stats,
-            'avg_resolution_hours': round(avg_resolution_hours, 2),
-            'technician_performance': tech_list,
-            'resolution_trend': { 'labels': trend_labels, 'avg_hours': res_avg_series },
-            'sla_breaches_by_day': { 'labels': trend_labels, 'counts': sla_counts_series },
-        })
+        return jsonify(build_analytics(request.args.get('range', 'week')))
     except Exception as e:
         return jsonify({'error': f'Analytics failed: {str(e)}'}), 500
 
-@app.route('/admin/create_category', methods=['POST'])
+def build_analytics(range_param='week'):
+    """Chart data for the admin analytics widgets over the last week or month."""
+    days = 7 if range_param == 'week' else 30
+    start_at = datetime.now(timezone.utc) - timedelta(days=days)
+
+    # Ticket volume by day
+    tickets_in_range = Ticket.query.filter(Ticket.created_at >= start_at).all()
+    by_day = {}
+    for t in tickets_in_range:
+        day_str = t.created_at.date().isoformat()
+        by_day[day_str] = by_day.get(day_str, 0) + 1
+    # Fill missing days
+    labels = []
+    counts = []
+    for i in range(days, -1, -1):
+        d = (datetime.now(timezone.utc) - timedelta(days=i)).date().isoformat()
+        labels.append(d)
+        counts.append(by_day.get(d, 0))
+
+    # Category counts in range
+    category_stats = []
+    for c in reference_cache.categories():
+        count = Ticket.query.filter(Ticket.category_id == c.id, Ticket.created_at >= start_at).count()
+        category_stats.append({'name': c.name, 'count': count})
+
+    # Avg resolution time (tickets resolved/closed in range by update time)
+    done = Ticket.query.filter(Ticket.status.in_(['resolved', 'closed']), Ticket.updated_at >= start_at).all()
+    avg_resolution_hours = 0
+    res_by_day_sum = {}
+    res_by_day_count = {}
+    if done:
+        total_hours = 0
+        for t in done:
+            hours = max(0, (t.updated_at - t.created_at).total_seconds()) / 3600
+            total_hours += hours
+            day_key = t.updated_at.date().isoformat()
+            res_by_day_sum[day_key] = res_by_day_sum.get(day_key, 0) + hours
+            res_by_day_count[day_key] = res_by_day_count.get(day_key, 0) + 1
+        avg_resolution_hours = total_hours / len(done)
+
+    # Technician performance (tickets resolved/closed in range)
+    tech_perf = {}
+    for t in done:
+        tech_id = t.assigned_to_id
+        if tech_id is None:
+            continue
+        if tech_id not in tech_perf:
+            u = User.query.get(tech_id)
+            tech_perf[tech_id] = {
+                'user_id': tech_id,
+                'username': (u.username if u else f'User {tech_id}'),
+                'closed_count': 0,
+                'total_hours': 0.0,
+            }
+        tech_perf[tech_id]['closed_count'] += 1
+        tech_perf[tech_id]['total_hours'] += max(0, (t.updated_at - t.created_at).total_seconds()) / 3600
+
+    tech_list = []
+    for v in tech_perf.values():
+        avg_h = v['total_hours'] / v['closed_count'] if v['closed_count'] else 0
+        tech_list.append({
+            'username': v['username'],
+            'closed_count': v['closed_count'],
+            'avg_resolution_hours': avg_h,
+        })
+
+    # SLA breaches by day (based on ActivityLog 'SLA Escalated')
+    sla_logs = ActivityLog.query.filter(
+        ActivityLog.action == 'SLA Escalated',
+        ActivityLog.timestamp >= start_at
+    ).all()
+    sla_by_day = {}
+    for log in sla_logs:
+        day_key = log.timestamp.date().isoformat()
+        sla_by_day[day_key] = sla_by_day.get(day_key, 0) + 1
+
+    # Build aligned day labels for trend series
+    trend_labels = []
+    res_avg_series = []
+    sla_counts_series = []
+    for i in range(days, -1, -1):
+        day = (datetime.now(timezone.utc) - timedelta(days=i)).date().isoformat()
+        trend_labels.append(day)
+        # average resolution hours that day
+        if res_by_day_count.get(day, 0) > 0:
+            res_avg_series.append(round(res_by_day_sum.get(day, 0) / res_by_day_count.get(day, 1), 2))
+        else:
+            res_avg_series.append(0)
+        sla_counts_series.append(sla_by_day.get(day, 0))
+
+    return {
+        'range': range_param,
+        'volume_by_day': { 'labels': labels, 'counts': counts },
+        'category_counts': category_stats,
+        'avg_resolution_hours': round(avg_resolution_hours, 2),
+        'technician_performance': tech_list,
+        'resolution_trend': { 'labels': trend_labels, 'avg_hours': res_avg_series },
+        'sla_breaches_by_day': { 'labels': trend_labels, 'counts': sla_counts_series },
+    }
+
+@bp.route('/admin/create_category', methods=['POST'])
 @login_required
 def create_category():
     if not current_user.is_admin():
         flash('Access denied.')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     name = request.form['name']
     description = request.form.get('description', '')
@@ -735,16 +2458,34 @@ def create_category():
         category = Category(name=name, description=description)
         db.session.add(category)
         db.session.commit()
+        reference_cache.invalidate('categories')
         flash('Category created successfully!')
     
-    return redirect(url_for('admin_panel'))
+    return redirect(url_for('main.admin_panel'))
+
+@bp.route('/admin/category/<int:category_id>/assignment', methods=['POST'])
+@login_required
+def update_category_assignment(category_id):
+    if not current_user.is_admin():
+        flash('Access denied.')
+        return redirect(url_for('main.dashboard'))
+    
+    category = Category.query.get_or_404(category_id)
+    technician_ids = {int(t) for t in request.form.getlist('technician_ids') if t.isdigit()}
+    category.auto_assign = request.form.get('auto_assign') == 'on'
+    category.technicians = User.query.filter(User.id.in_(technician_ids), User.role == 'technician').all() if technician_ids else []
+    db.session.commit()
+    assignment_engine.invalidate()
+    flash(f'Auto-assignment {"enabled" if category.auto_assign else "disabled"} for {category.name}.')
+    
+    return redirect(url_for('main.admin_panel'))
 
-@app.route('/admin/update_user_role/<int:user_id>', methods=['POST'])
+@bp.route('/admin/update_user_role/<int:user_id>', methods=['POST'])
 @login_required
 def update_user_role(user_id):
     if not current_user.is_admin():
         flash('Access denied.')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     user = User.query.get_or_404(user_id)
     new_role = request.form['role']
@@ -752,44 +2493,27 @@ def update_user_role(user_id):
     if new_role in ['user', 'technician', 'admin']:
         user.role = new_role
         db.session.commit()
+        user_cache.invalidate(user.id)
+        reference_cache.invalidate('staff', 'admins')
+        assignment_engine.invalidate()
         flash(f'User role updated to {new_role}.')
     else:
         flash('Invalid role specified.')
     
-    return redirect(url_for('admin_panel'))
+    return redirect(url_for('main.admin_panel'))
 
-@app.route('/admin/export_data')
+@bp.route('/admin/export_data')
 @login_required
 def export_data():
     if not current_user.is_admin():
         flash('Access denied.')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     try:
-        import csv
-        import io
         from flask import make_response
         
-        # Create CSV data
         output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Export tickets data
-        writer.writerow(['Ticket ID', 'Title', 'Status', 'Priority', 'Created By', 'Assigned To', 'Category', 'Created Date', 'Updated Date'])
-        
-        tickets = Ticket.query.all()
-        for ticket in tickets:
-            writer.writerow([
-                ticket.id,
-                ticket.title,
-                ticket.status,
-                ticket.priority,
-                ticket.creator.username,
-                ticket.assignee.username if ticket.assignee else 'Unassigned',
-                ticket.category.name if ticket.category else 'None',
-                ticket.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                ticket.updated_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
+        write_ticket_export(output)
         
         # Create response
         response = make_response(output.getvalue())
@@ -800,162 +2524,557 @@ def export_data():
         
     except Exception as e:
         flash(f'Export failed: {str(e)}')
-        return redirect(url_for('admin_panel'))
+        return redirect(url_for('main.admin_panel'))
+
+EXPORT_COLUMNS = ['Ticket ID', 'Title', 'Status', 'Priority', 'Created By', 'Assigned To', 'Category', 'Created Date', 'Updated Date']
+
+def write_ticket_export(stream, progress=None, batch_size=1000):
+    """Write every ticket as CSV to stream, one keyset-paged joined query per batch.
+
+    No cursor stays open between batches, so progress (called with the
+    percentage done after each batch) may write to the database.
+    """
+    creator = db.aliased(User)
+    assignee = db.aliased(User)
+    total = Ticket.query.count()
+    query = (db.session.query(Ticket.id, Ticket.title, Ticket.status, Ticket.priority, creator.username,
+                              assignee.username, Category.name, Ticket.created_at, Ticket.updated_at)
+             .join(creator, Ticket.created_by_id == creator.id)
+             .outerjoin(assignee, Ticket.assigned_to_id == assignee.id)
+             .outerjoin(Category, Ticket.category_id == Category.id)
+             .order_by(Ticket.id))
+    writer = csv.writer(stream)
+    writer.writerow(EXPORT_COLUMNS)
+    written = 0
+    last_id = 0
+    while True:
+        rows = query.filter(Ticket.id > last_id).limit(batch_size).all()
+        if not rows:
+            break
+        for ticket_id, title, status, priority, created_by, assigned_to, category, created_at, updated_at in rows:
+            writer.writerow([
+                ticket_id,
+                title,
+                status,
+                priority,
+                created_by,
+                assigned_to or 'Unassigned',
+                category or 'None',
+                created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                updated_at.strftime('%Y-%m-%d %H:%M:%S')
+            ])
+        written += len(rows)
+        last_id = rows[-1][0]
+        if progress:
+            progress(100 * written // max(total, 1))
+
+# Bulk ticket import
+# Accepts the columns written by export_data() as well as snake_case keys.
+IMPORT_FIELD_ALIASES = {
+    'title': 'title', 'Title': 'title',
+    'description': 'description', 'Description': 'description',
+    'status': 'status', 'Status': 'status',
+    'priority': 'priority', 'Priority': 'priority',
+    'created_by': 'created_by', 'Created By': 'created_by',
+    'assigned_to': 'assigned_to', 'Assigned To': 'assigned_to',
+    'category': 'category', 'Category': 'category',
+    'created_at': 'created_at', 'Created Date': 'created_at',
+    'updated_at': 'updated_at', 'Updated Date': 'updated_at',
+}
+IMPORT_MAX_REPORTED_ERRORS = 100
+
+def _parse_import_datetime(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return datetime.fromisoformat(value)
+
+def iter_import_records(stream, fmt):
+    """Yield (line_number, record) from a text stream of NDJSON or CSV."""
+    if fmt == 'ndjson':
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, e
+    else:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+
+def _import_row(record, user_ids, category_ids):
+    """Validate one import record and return the ticket row; raises ValueError with the reason."""
+    row = {IMPORT_FIELD_ALIASES[k]: v for k, v in record.items() if k in IMPORT_FIELD_ALIASES}
+    # NDJSON values may be any JSON type; every field is text like a CSV cell
+    for field, value in row.items():
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f'Field {field!r} must be a string, got {type(value).__name__}')
+
+    title = (row.get('title') or '').strip()
+    if not title:
+        raise ValueError('Missing title')
+    created_by_id = user_ids.get(row.get('created_by'))
+    if created_by_id is None:
+        raise ValueError(f"Unknown creator: {row.get('created_by')!r}")
+    assigned_to = row.get('assigned_to')
+    assigned_to_id = None
+    if assigned_to and assigned_to != 'Unassigned':
+        assigned_to_id = user_ids.get(assigned_to)
+        if assigned_to_id is None:
+            raise ValueError(f'Unknown assignee: {assigned_to!r}')
+    category = row.get('category')
+    category_id = None
+    if category and category != 'None':
+        category_id = category_ids.get(category)
+        if category_id is None:
+            raise ValueError(f'Unknown category: {category!r}')
+    status = row.get('status') or 'open'
+    priority = row.get('priority') or 'medium'
+    if status not in TICKET_STATUSES or priority not in TICKET_PRIORITIES:
+        raise ValueError(f'Invalid status/priority: {status!r}/{priority!r}')
+    try:
+        created_at = _parse_import_datetime(row.get('created_at')) or datetime.now(timezone.utc)
+        updated_at = _parse_import_datetime(row.get('updated_at')) or created_at
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid date: {e}')
+
+    return {
+        'title': title[:200],
+        'description': row.get('description') or '',
+        'status': status,
+        'priority': priority,
+        'created_at': created_at,
+        'updated_at': updated_at,
+        'created_by_id': created_by_id,
+        'assigned_to_id': assigned_to_id,
+        'category_id': category_id,
+    }
+
+def import_tickets(stream, fmt='csv', batch_size=1000, progress=None):
+    """Stream tickets into the database in executemany batches.
+
+    Usernames and categories are resolved through in-memory maps built once up
+    front, no notifications are sent and each batch is committed on its own so
+    memory stays flat. Returns a summary with per-row errors (capped).
+    """
+    user_ids = dict(db.session.query(User.username, User.id).all())
+    category_ids = dict(db.session.query(Category.name, Category.id).all())
+    insert_stmt = Ticket.__table__.insert()
+
+    summary = {'processed': 0, 'imported': 0, 'failed': 0, 'errors': []}
+    batch = []
+
+    def fail(line_no, message):
+        summary['failed'] += 1
+        if len(summary['errors']) < IMPORT_MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line_no, 'error': message})
+
+    def flush():
+        if batch:
+            db.session.execute(insert_stmt, batch)
+            db.session.commit()
+            summary['imported'] += len(batch)
+            batch.clear()
+        if progress:
+            progress(summary)
+
+    for line_no, record in iter_import_records(stream, fmt):
+        summary['processed'] += 1
+        if isinstance(record, Exception) or not isinstance(record, dict):
+            fail(line_no, f'Unparseable record: {record}')
+            continue
+        try:
+            batch.append(_import_row(record, user_ids, category_ids))
+        except ValueError as e:
+            fail(line_no, str(e))
+        except Exception as e:
+            fail(line_no, f'Invalid record: {e}')
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    if summary['imported']:
+        assignment_engine.invalidate()
+    return summary
+
+def _import_format(filename, requested=None):
+    if requested in ('csv', 'ndjson'):
+        return requested
+    return 'ndjson' if filename and filename.lower().endswith(('.ndjson', '.jsonl', '.json')) else 'csv'
+
+@bp.route('/admin/import_tickets', methods=['POST'])
+@login_required
+def import_tickets_upload():
+    if not current_user.is_admin():
+        flash('Access denied.')
+        return redirect(url_for('main.dashboard'))
+
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        flash('No file selected for import.')
+        return redirect(url_for('main.admin_panel'))
+
+    fmt = _import_format(file.filename, request.form.get('format'))
+    try:
+        stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+        summary = import_tickets(stream, fmt)
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Import failed: {str(e)}')
+        return redirect(url_for('main.admin_panel'))
 
-@app.route('/admin/generate_report')
+    flash(f"Imported {summary['imported']} of {summary['processed']} ticket(s); {summary['failed']} failed.")
+    for err in summary['errors'][:5]:
+        flash(f"Line {err['line']}: {err['error']}")
+    return redirect(url_for('main.admin_panel'))
+
+@bp.route('/admin/generate_report')
 @login_required
 def generate_report():
     if not current_user.is_admin():
         return jsonify({'error': 'Access denied'}), 403
     
     try:
-        # Generate comprehensive system report
-        total_tickets = Ticket.query.count()
-        total_users = User.query.count()
-        
-        # Ticket statistics
-        open_tickets = Ticket.query.filter(Ticket.status.in_(['open', 'in_progress'])).count()
-        closed_tickets = Ticket.query.filter(Ticket.status.in_(['resolved', 'closed'])).count()
-        
-        # Priority breakdown
-        urgent_tickets = Ticket.query.filter_by(priority='urgent').count()
-        high_tickets = Ticket.query.filter_by(priority='high').count()
-        medium_tickets = Ticket.query.filter_by(priority='medium').count()
-        low_tickets = Ticket.query.filter_by(priority='low').count()
-        
-        # User role breakdown
-        admins = User.query.filter_by(role='admin').count()
-        technicians = User.query.filter_by(role='technician').count()
-        users = User.query.filter_by(role='user').count()
-        
-        # Recent activity (last 7 days)
-        from datetime import timedelta
-        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-        recent_tickets = Ticket.query.filter(Ticket.created_at >= week_ago).count()
-        recent_activity = ActivityLog.query.filter(ActivityLog.timestamp >= week_ago).count()
-        
-        # Category breakdown
-        categories = Category.query.all()
-        category_stats = []
-        for category in categories:
-            category_stats.append({
-                'name': category.name,
-                'count': category.tickets.count()
-            })
-        
-        # Average resolution time (simplified)
-        resolved_tickets = Ticket.query.filter(Ticket.status.in_(['resolved', 'closed'])).all()
-        avg_resolution_hours = 0
-        if resolved_tickets:
-            total_hours = 0
-            for ticket in resolved_tickets:
-                hours = (ticket.updated_at - ticket.created_at).total_seconds() / 3600
-                total_hours += hours
-            avg_resolution_hours = total_hours / len(resolved_tickets)
-        
-        report_data = {
-            'generated_at': datetime.now(timezone.utc).isoformat(),
-            'system_overview': {
-                'total_tickets': total_tickets,
-                'total_users': total_users,
-                'open_tickets': open_tickets,
-                'closed_tickets': closed_tickets,
-                'avg_resolution_hours': round(avg_resolution_hours, 2)
-            },
-            'weekly': {
-                'new_tickets': Ticket.query.filter(Ticket.created_at >= week_ago).count(),
-            },
-            'priority_breakdown': {
-                'urgent': urgent_tickets,
-                'high': high_tickets,
-                'medium': medium_tickets,
-                'low': low_tickets
-            },
-            'user_roles': {
-                'admins': admins,
-                'technicians': technicians,
-                'users': users
-            },
-            'recent_activity': {
-                'new_tickets_last_week': recent_tickets,
-                'total_activities_last_week': recent_activity
-            },
-            'categories': category_stats
-        }
-        
-        return jsonify(report_data)
-        
+        return jsonify(build_system_report())
     except Exception as e:
         return jsonify({'error': f'Report generation failed: {str(e)}'}), 500
 
-@app.route('/admin/system_health')
+def build_system_report():
+    """System-wide ticket, user and activity statistics for the admin report."""
+    # Generate comprehensive system report
+    week_ago = datetime.now(timezone.utc) - timedelta(days=7)
+    stats = ticket_statistics(since=week_ago)
+    roles = user_role_counts()
+    recent_activity = ActivityLog.query.filter(ActivityLog.timestamp >= week_ago).count()
+    
+    # Category breakdown
+    category_stats = [
+        {'name': category.name, 'count': stats['by_category'].get(category.id, 0)}
+        for category in reference_cache.categories()
+    ]
+    
+    report_data = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'system_overview': {
+            'total_tickets': stats['total'],
+            'total_users': sum(roles.values()),
+            'open_tickets': stats['open'],
+            'closed_tickets': stats['closed'],
+            'avg_resolution_hours': round(stats['avg_resolution_hours'], 2)
+        },
+        'weekly': {
+            'new_tickets': stats['created_since'],
+        },
+        'priority_breakdown': stats['priority'],
+        'user_roles': {
+            'admins': roles['admin'],
+            'technicians': roles['technician'],
+            'users': roles['user']
+        },
+        'recent_activity': {
+            'new_tickets_last_week': stats['created_since'],
+            'total_activities_last_week': recent_activity
+        },
+        'categories': category_stats
+    }
+    
+    return report_data
+
+# Background report jobs
+ReportJobKind = namedtuple('ReportJobKind', 'label extension mimetype run')
+
+def _run_json_job(build):
+    def run(stream, params, progress):
+        json.dump(build(params), stream)
+    return run
+
+REPORT_JOB_KINDS = {
+    'report': ReportJobKind('System report', 'json', 'application/json', _run_json_job(lambda params: build_system_report())),
+    'analytics': ReportJobKind('Analytics', 'json', 'application/json',
+                               _run_json_job(lambda params: build_analytics(params.get('range', 'week')))),
+    'export': ReportJobKind('Ticket export', 'csv', 'text/csv',
+                            lambda stream, params, progress: write_ticket_export(stream, progress)),
+}
+
+_report_worker_app = None
+
+def _init_report_worker(config):
+    global _report_worker_app
+    _report_worker_app = create_app(config)
+
+def run_report_job(job_id):
+    """Pool process entry point."""
+    with _report_worker_app.app_context():
+        report_jobs.execute(job_id)
+
+class ReportJobRunner:
+    """Runs report and export jobs in a process pool, tracked in the report_job table.
+
+    Web workers only insert a row and hand its id to a small per-process pool
+    of spawned processes, so requests return at once. A pool process claims
+    the job with a conditional UPDATE, writes the result to
+    REPORT_RESULTS_FOLDER and records progress as it goes. A heartbeat thread
+    keeps heartbeat_at fresh for as long as the job runs, even when it has no
+    progress to report, so only jobs whose process died go stale. Those and
+    queued jobs whose submission was lost are picked up again on the next
+    enqueue; a job already claimed REPORT_JOB_MAX_ATTEMPTS times is failed
+    instead. Expired results are deleted then, or when someone tries to
+    download them.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        self.workers = app.config['REPORT_WORKERS']
+        self.results_folder = app.config['REPORT_RESULTS_FOLDER']
+        self.result_ttl = app.config['REPORT_RESULT_TTL']
+        self.stale_seconds = app.config['REPORT_JOB_STALE_SECONDS']
+        self.max_attempts = app.config['REPORT_JOB_MAX_ATTEMPTS']
+
+    def _worker_config(self):
+        # Pool processes build their own app against the same database and folders
+        config = {key: self._app.config[key] for key in (
+            'SQLALCHEMY_DATABASE_URI', 'UPLOAD_FOLDER', 'REPORT_RESULTS_FOLDER', 'REPORT_RESULT_TTL',
+            'REPORT_JOB_STALE_SECONDS')}
+        config.update(BOOTSTRAP_ON_START=False, HEALTH_SAMPLE_INTERVAL=0, UPLOAD_SWEEP_INTERVAL=0)
+        return config
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                # spawn, not fork: web workers have threads and open connections
+                self._pool = ProcessPoolExecutor(
+                    max_workers=max(self.workers, 1),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_report_worker,
+                    initargs=(self._worker_config(),),
+                )
+                self._pid = os.getpid()
+            return self._pool
+
+    def _submit(self, job_id):
+        try:
+            self._executor().submit(run_report_job, job_id)
+        except BrokenProcessPool:
+            with self._lock:
+                self._pool = None
+            self._executor().submit(run_report_job, job_id)
+
+    def enqueue(self, kind, params, user_id):
+        job = ReportJob(kind=kind, params=json.dumps(params), created_by_id=user_id)
+        db.session.add(job)
+        db.session.commit()
+        self._submit(job.id)
+        self.maintain()
+        return job
+
+    def maintain(self):
+        """Resubmit lost or stalled jobs and delete expired results."""
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=self.stale_seconds)
+        stalled = ReportJob.query.filter(ReportJob.status == 'running', ReportJob.heartbeat_at < stale)
+        stalled.filter(ReportJob.attempts >= self.max_attempts).update(
+            {'status': 'failed', 'finished_at': now,
+             'message': f'Worker process died {self.max_attempts} times; not retrying'}, synchronize_session=False)
+        stalled.update({'status': 'queued'}, synchronize_session=False)
+        for job in ReportJob.query.filter(ReportJob.status == 'done', ReportJob.expires_at < now).all():
+            self.expire(job)
+        db.session.commit()
+        lost = db.session.query(ReportJob.id).filter(ReportJob.status == 'queued', ReportJob.created_at < now - timedelta(minutes=1))
+        for (job_id,) in lost:
+            self._submit(job_id)
+
+    def expire(self, job):
+        """Delete a job's result file and mark it expired; the caller commits."""
+        if job.result_path:
+            try:
+                os.remove(job.result_path)
+            except OSError:
+                pass
+        job.status = 'expired'
+        job.result_path = None
+
+    def _update(self, job_id, **values):
+        # Separate short transaction, so progress is visible while the job's query is still streaming
+        values['heartbeat_at'] = datetime.now(timezone.utc)
+        with db.engine.begin() as conn:
+            conn.execute(db.update(ReportJob).where(ReportJob.id == job_id).values(**values))
+
+    @contextmanager
+    def _heartbeat(self, job_id):
+        app = current_app._get_current_object()
+        stop = threading.Event()
+
+        def beat():
+            with app.app_context():
+                while not stop.wait(max(self.stale_seconds / 4, 1)):
+                    try:
+                        self._update(job_id)
+                    except Exception as e:
+                        print(f"Report job {job_id} heartbeat failed: {e}")
+
+        thread = threading.Thread(target=beat, name=f'report-job-{job_id}-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def execute(self, job_id):
+        """Claim a queued job, run it and store the result; runs inside a pool process."""
+        now = datetime.now(timezone.utc)
+        claimed = ReportJob.query.filter_by(id=job_id, status='queued').update(
+            {'status': 'running', 'started_at': now, 'heartbeat_at': now, 'progress': 0,
+             'attempts': ReportJob.attempts + 1}, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            return
+        job = ReportJob.query.get(job_id)
+        kind = REPORT_JOB_KINDS[job.kind]
+        os.makedirs(self.results_folder, exist_ok=True)
+        path = os.path.join(self.results_folder, f'job{job_id}_{secrets.token_hex(8)}.{kind.extension}')
+        try:
+            with self._heartbeat(job_id), open(path + '.part', 'w', newline='', encoding='utf-8') as stream:
+                kind.run(stream, json.loads(job.params or '{}'), lambda percent: self._update(job_id, progress=percent))
+            os.replace(path + '.part', path)
+            finished = datetime.now(timezone.utc)
+            self._update(job_id, status='done', progress=100, result_path=path, finished_at=finished,
+                         expires_at=finished + timedelta(seconds=self.result_ttl))
+        except Exception as e:
+            print(f"Report job {job_id} failed: {e}")
+            db.session.rollback()
+            try:
+                os.remove(path + '.part')
+            except OSError:
+                pass
+            self._update(job_id, status='failed', message=str(e), finished_at=datetime.now(timezone.utc))
+
+report_jobs = ReportJobRunner()
+
+def report_job_json(job):
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'label': REPORT_JOB_KINDS[job.kind].label,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+        'status_url': url_for('main.report_job_status', job_id=job.id),
+    }
+    if job.status == 'done':
+        data['download_url'] = url_for('main.download_report_job', job_id=job.id)
+    return data
+
+@bp.route('/admin/jobs', methods=['GET', 'POST'])
+@login_required
+def report_job_list():
+    """POST queues a job (kind=report|analytics|export); GET lists recent jobs."""
+    if not current_user.is_admin():
+        return jsonify({'error': 'Access denied'}), 403
+    
+    if request.method == 'GET':
+        jobs = ReportJob.query.order_by(ReportJob.id.desc()).limit(20).all()
+        return jsonify({'jobs': [report_job_json(job) for job in jobs]})
+    
+    payload = request.get_json(silent=True) if request.is_json else request.form
+    kind = (payload or {}).get('kind')
+    if kind not in REPORT_JOB_KINDS:
+        return jsonify({'error': f"Unknown job kind; choose from {', '.join(REPORT_JOB_KINDS)}"}), 400
+    params = {'range': payload.get('range', 'week')} if kind == 'analytics' else {}
+    try:
+        job = report_jobs.enqueue(kind, params, current_user.id)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Could not queue job: {str(e)}'}), 500
+    return jsonify(report_job_json(job)), 202, {'Location': url_for('main.report_job_status', job_id=job.id)}
+
+@bp.route('/admin/jobs/<int:job_id>')
+@login_required
+def report_job_status(job_id):
+    if not current_user.is_admin():
+        return jsonify({'error': 'Access denied'}), 403
+    return jsonify(report_job_json(ReportJob.query.get_or_404(job_id)))
+
+@bp.route('/admin/jobs/<int:job_id>/download')
+@login_required
+def download_report_job(job_id):
+    if not current_user.is_admin():
+        return jsonify({'error': 'Access denied'}), 403
+    
+    job = ReportJob.query.get_or_404(job_id)
+    if job.status == 'done' and job.expires_at and job.expires_at.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
+        report_jobs.expire(job)
+        db.session.commit()
+    if job.status == 'expired':
+        return jsonify({'error': 'This result has expired; run the job again.'}), 410
+    if job.status != 'done' or not job.result_path or not os.path.exists(job.result_path):
+        return jsonify({'error': f'Job is {job.status}'}), 409
+    kind = REPORT_JOB_KINDS[job.kind]
+    stamp = (job.finished_at or job.created_at).strftime('%Y%m%d_%H%M%S')
+    return send_from_directory(os.path.dirname(job.result_path), os.path.basename(job.result_path),
+                               mimetype=kind.mimetype, as_attachment=request.args.get('inline') != '1',
+                               download_name=f'medsupport_{job.kind}_{stamp}.{kind.extension}')
+
+@bp.route('/admin/system_health')
 @login_required
 def system_health():
     if not current_user.is_admin():
         return jsonify({'error': 'Access denied'}), 403
     
     try:
-        import os
-        import psutil
-        
-        # Database health
-        db_status = 'healthy'
-        try:
-            db.session.execute('SELECT 1')
-            db_status = 'healthy'
-        except Exception:
-            db_status = 'error'
-        
-        # System metrics
-        cpu_percent = psutil.cpu_percent(interval=None)
-        memory = psutil.virtual_memory()
-        
-        # Try different disk paths for Windows compatibility
-        disk = None
-        try:
-            disk = psutil.disk_usage('C:')
-        except:
-            try:
-                disk = psutil.disk_usage('/')
-            except:
-                # Fallback with default values
-                disk = type('DiskUsage', (), {
-                    'percent': 0,
-                    'used': 0,
-                    'total': 1
-                })()
-        
-        # Application health
-        total_tickets = Ticket.query.count()
-        total_users = User.query.count()
-        
-        # Check for any urgent issues
-        urgent_tickets = Ticket.query.filter_by(priority='urgent', status='open').count()
+        # Served from the background sampler; only sample inline before the first tick
+        current = health_sampler.latest() or health_sampler.sample()
         
         health_data = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-            'overall_status': 'healthy' if db_status == 'healthy' and cpu_percent < 80 else 'warning',
+            'timestamp': current['timestamp'],
+            'overall_status': 'healthy' if current['db_status'] == 'healthy' and current.get('cpu_percent', 0) < 80 else 'warning',
             'database': {
-                'status': db_status,
-                'total_tickets': total_tickets,
-                'total_users': total_users
+                'status': current['db_status'],
+                'total_tickets': current.get('total_tickets', 0),
+                'total_users': current.get('total_users', 0),
+                'db_size_mb': current['db_size_mb'],
+                'wal_size_mb': current['wal_size_mb'],
             },
             'system_resources': {
-                'cpu_percent': cpu_percent,
-                'memory_percent': memory.percent,
-                'memory_used_gb': round(memory.used / (1024**3), 2),
-                'memory_total_gb': round(memory.total / (1024**3), 2),
-                'disk_percent': disk.percent,
-                'disk_used_gb': round(disk.used / (1024**3), 2),
-                'disk_total_gb': round(disk.total / (1024**3), 2)
+                'cpu_percent': current.get('cpu_percent', 0),
+                'memory_percent': current.get('memory_percent', 0),
+                'memory_used_gb': current.get('memory_used_gb', 0),
+                'memory_total_gb': current.get('memory_total_gb', 0),
+                'disk_percent': current.get('disk_percent', 0),
+                'disk_used_gb': current.get('disk_used_gb', 0),
+                'disk_total_gb': current.get('disk_total_gb', 0),
             },
             'application_metrics': {
-                'urgent_open_tickets': urgent_tickets,
-                'total_categories': Category.query.count(),
-                'recent_activity_count': ActivityLog.query.filter(
-                    ActivityLog.timestamp >= datetime.now(timezone.utc) - timedelta(hours=24)
-                ).count()
-            }
+                'urgent_open_tickets': current.get('urgent_open_tickets', 0),
+                'total_categories': current.get('total_categories', 0),
+                'recent_activity_count': current.get('recent_activity_count', 0),
+                'request_rate': current['request_rate'],
+            },
+            'queues': {
+                'open_tickets': current.get('open_tickets', 0),
+                'unassigned_tickets': current.get('unassigned_tickets', 0),
+            },
+            'storage': upload_sweeper.summary(),
+            'sample_interval_seconds': health_sampler.interval,
+            'history': health_sampler.history(),
         }
         
         return jsonify(health_data)
@@ -966,7 +3085,7 @@ def system_health():
         print(traceback.format_exc())
         return jsonify({'error': f'Health check failed: {str(e)}'}), 500
 
-@app.route('/admin/clear_cache', methods=['POST'])
+@bp.route('/admin/clear_cache', methods=['POST'])
 @login_required
 def clear_cache():
     if not current_user.is_admin():
@@ -983,8 +3102,8 @@ def clear_cache():
         for log in old_logs:
             db.session.delete(log)
         
-        # Clear any temporary data or sessions (if implemented)
-        # This is a placeholder for additional cache clearing logic
+        # Drop this worker's rendered template fragments
+        fragment_cache.clear()
         
         db.session.commit()
         
@@ -1000,24 +3119,302 @@ def clear_cache():
         db.session.rollback()
         return jsonify({'error': f'Cache clearing failed: {str(e)}'}), 500
 
+# REST API (v1)
+# Collections are paged with an opaque keyset cursor over (sort column, id), so
+# pollers can resume an incremental sync from the last cursor they saw.
+ApiResource = namedtuple('ApiResource', 'model sort_column fields filters')
+
+API_RESOURCES = {
+    'tickets': ApiResource(
+        Ticket, Ticket.updated_at,
+        ['id', 'title', 'description', 'status', 'priority', 'created_at', 'updated_at',
+         'created_by_id', 'assigned_to_id', 'category_id', 'parent_id'],
+        ['status', 'priority', 'created_by_id', 'assigned_to_id', 'category_id', 'parent_id'],
+    ),
+    'activity': ApiResource(
+        ActivityLog, ActivityLog.timestamp,
+        ['id', 'ticket_id', 'action', 'description', 'timestamp', 'user_id'],
+        ['ticket_id', 'action', 'user_id'],
+    ),
+    'attachments': ApiResource(
+        Attachment, Attachment.uploaded_at,
+        ['id', 'ticket_id', 'filename', 'content_type', 'size_bytes', 'uploaded_at', 'uploaded_by_id'],
+        ['ticket_id', 'uploaded_by_id'],
+    ),
+    'categories': ApiResource(
+        Category, None,
+        ['id', 'name', 'description', 'auto_assign'],
+        [],
+    ),
+}
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+@api.errorhandler(ApiError)
+def handle_api_error(error):
+    return jsonify({'error': error.message}), error.status
+
+@api.errorhandler(404)
+def handle_api_not_found(error):
+    return jsonify({'error': 'Not found'}), 404
+
+@api.before_request
+def authenticate_api_token():
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        raise ApiError('Missing bearer token', 401)
+    token = ApiToken.query.filter_by(token_hash=ApiToken.hash_token(header[7:].strip())).first()
+    if token is None:
+        raise ApiError('Invalid token', 401)
+    now = datetime.now(timezone.utc)
+    # Record usage at most once a minute so polling doesn't turn every read into a write
+    if token.last_used_at is None or token.last_used_at.replace(tzinfo=timezone.utc) < now - timedelta(minutes=1):
+        token.last_used_at = now
+        db.session.commit()
+    g.api_user = token.user
+
+def _api_datetime(value, name):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ApiError(f'Invalid {name}; expected an ISO 8601 timestamp')
+    # Stored timestamps are naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _api_filter_value(column, name, value):
+    """A query-string filter as its column's Python type; empty means NULL."""
+    if not value:
+        return None
+    if column.type.python_type is int:
+        try:
+            return int(value)
+        except ValueError:
+            raise ApiError(f'Invalid {name}')
+    return value
+
+def _api_json_value(value):
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    return value
+
+def _encode_cursor(sort_value, row_id):
+    payload = json.dumps([sort_value.isoformat() if sort_value is not None else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return (datetime.fromisoformat(sort_value) if sort_value else None), int(row_id)
+    except (ValueError, TypeError):
+        raise ApiError('Invalid cursor')
+
+def _api_fields(resource):
+    requested = request.args.get('fields')
+    if not requested:
+        return list(resource.fields)
+    fields = [f.strip() for f in requested.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in resource.fields]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}; choose from {', '.join(resource.fields)}")
+    return ['id'] + [f for f in fields if f != 'id']
+
+def _api_scope(resource, query):
+    """Restrict regular users to their own tickets and what belongs to them."""
+    user = g.api_user
+    if user.is_technician() or resource.model is Category:
+        return query
+    if resource.model is Ticket:
+        return query.filter(Ticket.created_by_id == user.id)
+    own_tickets = db.select(Ticket.id).where(Ticket.created_by_id == user.id)
+    return query.filter(resource.model.ticket_id.in_(own_tickets))
+
+def _api_rows(resource, fields, query):
+    return [{field: _api_json_value(value) for field, value in zip(fields, row)} for row in query]
+
+def _api_collection(name, **filters):
+    resource = API_RESOURCES[name]
+    model, sort_column = resource.model, resource.sort_column
+    fields = _api_fields(resource)
+    try:
+        limit = min(max(int(request.args.get('limit', API_DEFAULT_LIMIT)), 1), API_MAX_LIMIT)
+    except ValueError:
+        raise ApiError('Invalid limit')
+
+    # Only the requested columns are selected; no ORM objects are built
+    columns = [getattr(model, field) for field in fields]
+    if sort_column is not None:
+        columns.append(sort_column)
+    query = _api_scope(resource, db.session.query(*columns))
+
+    for field in resource.filters:
+        if field in request.args:
+            filters[field] = _api_filter_value(getattr(model, field), field, request.args[field])
+    for field, value in filters.items():
+        query = query.filter(getattr(model, field) == value)
+    if sort_column is not None and request.args.get('updated_since'):
+        query = query.filter(sort_column >= _api_datetime(request.args['updated_since'], 'updated_since'))
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        sort_value, last_id = _decode_cursor(cursor)
+        if sort_column is not None and sort_value is not None:
+            query = query.filter(db.or_(sort_column > sort_value, db.and_(sort_column == sort_value, model.id > last_id)))
+        else:
+            query = query.filter(model.id > last_id)
+    order = [sort_column, model.id] if sort_column is not None else [model.id]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = cursor
+    if rows:
+        last = rows[-1]
+        next_cursor = _encode_cursor(last[-1] if sort_column is not None else None, last[0])
+    return jsonify({
+        'data': _api_rows(resource, fields, (row[:len(fields)] for row in rows)),
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    })
+
+@api.route('/tickets')
+def api_tickets():
+    """Tickets ordered by (updated_at, id); pass updated_since or a previous cursor to sync changes."""
+    return _api_collection('tickets')
+
+@api.route('/tickets/<int:ticket_id>')
+def api_ticket(ticket_id):
+    resource = API_RESOURCES['tickets']
+    fields = _api_fields(resource)
+    query = _api_scope(resource, db.session.query(*[getattr(Ticket, f) for f in fields]).filter(Ticket.id == ticket_id))
+    rows = _api_rows(resource, fields, query.all())
+    if not rows:
+        raise ApiError('Ticket not found', 404)
+    return jsonify({'data': rows[0]})
+
+@api.route('/tickets/<int:ticket_id>/activity')
+def api_ticket_activity(ticket_id):
+    return _api_collection('activity', ticket_id=ticket_id)
+
+@api.route('/tickets/<int:ticket_id>/attachments')
+def api_ticket_attachments(ticket_id):
+    return _api_collection('attachments', ticket_id=ticket_id)
+
+@api.route('/activity')
+def api_activity():
+    return _api_collection('activity')
+
+@api.route('/attachments')
+def api_attachments():
+    return _api_collection('attachments')
+
+@api.route('/categories')
+def api_categories():
+    return _api_collection('categories')
+
+@bp.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprint static files and precompress them into static/dist."""
+    manifest = build_assets(current_app.static_folder, current_app.config['ASSET_DIST_FOLDER'])
+    encodings = 'gzip and brotli' if brotli is not None else 'gzip'
+    click.echo(f'Built {len(manifest)} asset(s) with {encodings} variants in {current_app.config["ASSET_DIST_FOLDER"]}')
+
+@bp.cli.command('import-tickets')
+@click.argument('stream', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Input format (guessed from the extension by default).')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows per INSERT batch.')
+def import_tickets_command(stream, fmt, batch_size):
+    """Bulk import tickets from an NDJSON or CSV file (use - for stdin)."""
+    started = time.monotonic()
+
+    def report(summary):
+        rate = summary['processed'] / max(time.monotonic() - started, 1e-6)
+        click.echo(f"{summary['processed']} processed, {summary['imported']} imported, "
+                   f"{summary['failed']} failed ({rate:.0f} rows/s)", err=True)
+
+    summary = import_tickets(stream, _import_format(stream.name, fmt), batch_size=batch_size, progress=report)
+    for err in summary['errors']:
+        click.echo(f"line {err['line']}: {err['error']}", err=True)
+    click.echo(json.dumps({k: summary[k] for k in ('processed', 'imported', 'failed')}))
+
 # Initialize database
+DEFAULT_CATEGORIES = [
+    ('Hardware', 'Hardware-related issues'),
+    ('Software', 'Software-related issues'),
+    ('Network', 'Network and connectivity issues'),
+    ('Account', 'User account and access issues'),
+    ('Other', 'Other miscellaneous issues')
+]
+
+def _widen_column(conn, table, column, current_type):
+    wanted = getattr(column.type, 'length', None)
+    current = getattr(current_type, 'length', None)
+    if not wanted or not current or current >= wanted:
+        return
+    dialect = conn.dialect
+    if dialect.name == 'sqlite':
+        return
+    quote = dialect.identifier_preparer
+    new_type = column.type.compile(dialect=dialect)
+    if dialect.name == 'postgresql':
+        ddl = f'ALTER TABLE {quote.format_table(table)} ALTER COLUMN {quote.format_column(column)} TYPE {new_type}'
+    elif dialect.name in ('mysql', 'mariadb'):
+        ddl = f"ALTER TABLE {quote.format_table(table)} MODIFY {quote.format_column(column)} {new_type}{'' if column.nullable else ' NOT NULL'}"
+    else:
+        print(f"Cannot widen {table.name}.{column.name} to {new_type} on {dialect.name}; alter it by hand")
+        return
+    conn.execute(db.text(ddl))
+
+def upgrade_schema():
+    """Create missing tables, columns and indexes for the current models.
+
+    There is no migration framework here, so new columns must be nullable or
+    carry a server default to be added to an existing table. String columns
+    whose model length grew are widened in place (SQLite does not enforce
+    lengths, so it is left alone).
+    """
+    db.create_all()
+    inspector = db.inspect(db.engine)
+    dialect = db.engine.dialect
+    quote = dialect.identifier_preparer
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {c['name']: c for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    _widen_column(conn, table, column, existing[column.name]['type'])
+                    continue
+                if not column.nullable and column.server_default is None:
+                    print(f"Cannot add NOT NULL column {table.name}.{column.name} without a server default")
+                    continue
+                ddl = f'ALTER TABLE {quote.format_table(table)} ADD COLUMN {quote.format_column(column)} {column.type.compile(dialect=dialect)}'
+                default = dialect.ddl_compiler(dialect, None).get_column_default_string(column)
+                if default is not None:
+                    ddl += f' DEFAULT {default}'
+                conn.execute(db.text(ddl))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def ensure_default_categories():
+    existing = {name for (name,) in db.session.query(Category.name).all()}
+    for name, description in DEFAULT_CATEGORIES:
+        if name not in existing:
+            db.session.add(Category(name=name, description=description))
+    db.session.commit()
+
 def init_db():
     """Initialize database with sample data"""
-    db.create_all()
+    upgrade_schema()
     
     # Create default categories if they don't exist
-    default_categories = [
-        ('Hardware', 'Hardware-related issues'),
-        ('Software', 'Software-related issues'),
-        ('Network', 'Network and connectivity issues'),
-        ('Account', 'User account and access issues'),
-        ('Other', 'Other miscellaneous issues')
-    ]
-    
-    for name, description in default_categories:
-        if not Category.query.filter_by(name=name).first():
-            category = Category(name=name, description=description)
-            db.session.add(category)
+    ensure_default_categories()
     
     # Create default admin user if no users exist
     if not User.query.first():
@@ -1049,9 +3446,125 @@ def init_db():
     
     db.session.commit()
 
+def schema_fingerprint(app):
+    """Identify the database and model schema a bootstrap stamp was written for."""
+    parts = [app.config['SQLALCHEMY_DATABASE_URI']]
+    for table in db.metadata.sorted_tables:
+        columns = sorted(f'{c.name} {c.type}' for c in table.columns)
+        # upgrade_schema() also creates indexes, so an index-only change must alter the fingerprint too
+        indexes = sorted(f"{i.name}({','.join(c.name for c in i.columns)})" for i in table.indexes)
+        parts.append(table.name + ':' + ','.join(columns) + ';' + ','.join(indexes))
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+def _database_file(app):
+    with app.app_context():
+        url = db.engine.url
+        if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+            return url.database
+    return None
+
+def bootstrap(app):
+    """One-time, idempotent schema check and default data for this database.
+
+    An exclusive lock on instance/bootstrap.lock makes concurrent workers take
+    turns; the lock file also records the schema fingerprint that was last
+    bootstrapped, so only the first process does any work and the rest return
+    after a single read.
+    """
+    os.makedirs(app.instance_path, exist_ok=True)
+    lock_path = os.path.join(app.instance_path, 'bootstrap.lock')
+    fingerprint = schema_fingerprint(app)
+    database_file = _database_file(app)
+    with open(lock_path, 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            lock_file.seek(0)
+            up_to_date = lock_file.read().strip() == fingerprint
+            if up_to_date and (database_file is None or os.path.exists(database_file)):
+                return False
+            with app.app_context():
+                upgrade_schema()
+                ensure_default_categories()
+                if StorageUsage.query.get(0) is None:
+                    upload_sweeper.rebuild_usage()
+            lock_file.seek(0)
+            lock_file.truncate()
+            lock_file.write(fingerprint)
+            lock_file.flush()
+            return True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def create_app(config=None, instance_path=None):
+    """Application factory.
+
+    Works with gunicorn --preload ('app:create_app()'): the bootstrap runs once
+    in the master and pooled connections are closed before workers fork.
+    instance_path overrides Flask's instance folder (lock and state files).
+    """
+    app = Flask(__name__, instance_path=instance_path)
+    load_config(app)
+    if config:
+        app.config.update(config)
+
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    mail.init_app(app)
+    user_cache.init_app(app)
+    reference_cache.init_app(app)
+    fragment_cache.init_app(app)
+    health_sampler.init_app(app)
+    upload_sweeper.init_app(app)
+    report_jobs.init_app(app)
+    login_throttle.init_app(app)
+    assignment_engine.init_app(app)
+    duplicate_index.init_app(app)
+    app.register_blueprint(bp)
+    app.register_blueprint(api)
+
+    if app.config['BOOTSTRAP_ON_START']:
+        bootstrap(app)
+        # Don't hand inherited SQLite connections to forked workers
+        with app.app_context():
+            db.engine.dispose()
+    return app
+
+@bp.cli.command('sweep-uploads')
+def sweep_uploads_command():
+    """Quarantine orphaned upload files and refresh storage totals now."""
+    state = upload_sweeper.sweep(force=True)
+    if state is None:
+        click.echo('Sweep skipped (another process is sweeping, or the upload folder does not match attachments).')
+        return
+    click.echo(json.dumps(state['last_pass']))
+
+@bp.cli.command('create-api-token')
+@click.argument('username')
+@click.option('--name', default='integration', show_default=True, help='Label to recognise the token by.')
+def create_api_token_command(username, name):
+    """Issue a REST API token that acts as USERNAME (shown once)."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f'No user named {username}')
+    token = secrets.token_urlsafe(32)
+    db.session.add(ApiToken(name=name, token_hash=ApiToken.hash_token(token), user_id=user.id))
+    db.session.commit()
+    click.echo(token)
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Create the schema and seed default categories and demo accounts."""
+    init_db()
+    click.echo('Database initialized.')
+
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context():
         init_db()
     # Production settings
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=True)
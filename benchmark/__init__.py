@@ -0,0 +1,7 @@
+"""Load-benchmark suite for the MedSupport ticketing system.
+
+Usage:
+    python -m benchmark generate --db bench.db --tickets 20000
+    python -m benchmark run --db bench.db --out results.json
+    python -m benchmark compare before.json after.json
+"""
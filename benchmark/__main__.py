@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import sys
+
+from .datagen import database_uri, scratch_dir
+
+def _write(result, path):
+    text = json.dumps(result, indent=2)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description='MedSupport load benchmarks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate', help='Create a synthetic benchmark database')
+    gen.add_argument('--db', default='bench.db', help='SQLite file to (re)create')
+    gen.add_argument('--users', type=int, default=200)
+    gen.add_argument('--technicians', type=int, default=20)
+    gen.add_argument('--tickets', type=int, default=20000)
+    gen.add_argument('--activity-per-ticket', type=int, default=4)
+    gen.add_argument('--attachments', type=int, default=2000)
+    gen.add_argument('--days', type=int, default=365, help='Spread ticket creation over this many days')
+    gen.add_argument('--seed', type=int, default=42)
+
+    run = sub.add_parser('run', help='Run scenarios against a benchmark database')
+    run.add_argument('--db', default='bench.db')
+    run.add_argument('--scenario', action='append', dest='scenarios', help='Repeat to select several (default: all)')
+    run.add_argument('--iterations', type=int, default=200)
+    run.add_argument('--concurrency', type=int, default=1)
+    run.add_argument('--warmup', type=int, default=5)
+    run.add_argument('--seed', type=int, default=1)
+    run.add_argument('--url', help='Benchmark an already running server instead of the test client')
+    run.add_argument('--gunicorn', type=int, metavar='WORKERS', help='Start a local gunicorn with this many workers')
+    run.add_argument('--port', type=int, default=8765)
+    run.add_argument('--out', help='Write JSON results here (default: stdout)')
+
+    cmp_ = sub.add_parser('compare', help='Compare two result files')
+    cmp_.add_argument('baseline')
+    cmp_.add_argument('candidate')
+    cmp_.add_argument('--out')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        from .runner import compare, load_results
+        _write(compare(load_results(args.baseline), load_results(args.candidate)), args.out)
+        return 0
+
+    # Must be set before the app module is first imported
+    uri = database_uri(args.db)
+    os.environ['DATABASE_URL'] = uri
+    scratch = scratch_dir(args.db)
+
+    if args.command == 'generate':
+        from .datagen import generate
+        params = generate(scratch, users=args.users, technicians=args.technicians, tickets=args.tickets,
+                          activity_per_ticket=args.activity_per_ticket, attachments=args.attachments,
+                          days=args.days, seed=args.seed)
+        print(json.dumps({'database': uri, **params}))
+        return 0
+
+    from .runner import SCENARIOS, run as run_benchmark
+    unknown = set(args.scenarios or []) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}; choose from {', '.join(SCENARIOS)}")
+    result = run_benchmark(uri, scratch, scenarios=args.scenarios, iterations=args.iterations,
+                           concurrency=args.concurrency, warmup=args.warmup, seed=args.seed,
+                           base_url=args.url, gunicorn_workers=args.gunicorn, port=args.port)
+    _write(result, args.out)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Synthetic data generator for benchmarks.
+
+Rows are written with executemany batches straight into the app's tables, with
+a fixed random seed so the same parameters always produce the same dataset.
+"""
+import os
+import random
+from datetime import datetime, timezone, timedelta
+
+from werkzeug.security import generate_password_hash
+
+BENCH_PASSWORD = 'bench123'
+BENCH_ADMIN = 'bench_admin'
+BENCH_TECHNICIAN = 'bench_tech'
+BENCH_USER = 'bench_user'
+
+# Rough shape of a real helpdesk: most tickets are closed, few are urgent
+PRIORITY_WEIGHTS = {'low': 35, 'medium': 40, 'high': 18, 'urgent': 7}
+STATUS_WEIGHTS = {'open': 20, 'in_progress': 15, 'resolved': 35, 'closed': 30}
+ACTIONS = ['Comment Added', 'Status Changed', 'Assignment Changed', 'Priority Changed']
+TITLE_WORDS = ['printer', 'VPN', 'login', 'monitor', 'EHR', 'badge', 'email', 'Wi-Fi',
+               'scanner', 'workstation', 'password', 'pager', 'PACS', 'telemetry']
+
+def database_uri(path):
+    return f'sqlite:///{os.path.abspath(path)}'
+
+def scratch_dir(path):
+    """Uploads and instance files for a benchmark database, kept beside it (bench.db -> bench_files/)."""
+    return os.path.splitext(os.path.abspath(path))[0] + '_files'
+
+def scratch_app_options(scratch):
+    """create_app() config and instance_path that keep a benchmark away from real uploads and state."""
+    config = {
+        'UPLOAD_FOLDER': os.path.join(scratch, 'uploads'),
+        # No background sweeps or health sampling in benchmark processes
+        'UPLOAD_SWEEP_INTERVAL': 0,
+        'HEALTH_SAMPLE_INTERVAL': 0,
+    }
+    return config, os.path.join(scratch, 'instance')
+
+def _weighted(rng, weights, k):
+    return rng.choices(list(weights), weights=list(weights.values()), k=k)
+
+def _chunks(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def generate(scratch, users=200, technicians=20, tickets=20000, activity_per_ticket=4,
+             attachments=2000, days=365, seed=42, batch_size=5000):
+    """Populate an empty database and return the generation parameters.
+
+    Attachment rows point into scratch/uploads, never the real UPLOAD_FOLDER.
+    """
+    # The app reads DATABASE_URL, which callers point at a scratch database first
+    from app import create_app, db, User, Ticket, ActivityLog, Attachment, Category, init_db
+
+    config, instance_path = scratch_app_options(scratch)
+    app = create_app({'BOOTSTRAP_ON_START': False, **config}, instance_path=instance_path)
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+
+    with app.app_context():
+        db.drop_all()
+        init_db()
+        # Drop the demo accounts so every benchmark user shares one password
+        User.query.delete()
+        db.session.commit()
+
+        user_rows = [
+            {'username': BENCH_ADMIN, 'email': 'bench_admin@example.com', 'role': 'admin'},
+            {'username': BENCH_TECHNICIAN, 'email': 'bench_tech@example.com', 'role': 'technician'},
+            {'username': BENCH_USER, 'email': 'bench_user@example.com', 'role': 'user'},
+        ]
+        for i in range(technicians - 1):
+            user_rows.append({'username': f'tech{i}', 'email': f'tech{i}@example.com', 'role': 'technician'})
+        for i in range(users - 1):
+            user_rows.append({'username': f'user{i}', 'email': f'user{i}@example.com', 'role': 'user'})
+        for row in user_rows:
+            row['password_hash'] = password_hash
+            row['created_at'] = now - timedelta(days=days)
+        db.session.execute(User.__table__.insert(), user_rows)
+        db.session.commit()
+
+        staff_ids = [u.id for u in User.query.filter(User.role.in_(['admin', 'technician'])).all()]
+        requester_ids = [u.id for u in User.query.filter_by(role='user').all()]
+        category_ids = [c.id for c in Category.query.all()]
+        # A few technicians and requesters carry most of the load
+        staff_weights = [1.0 / (rank + 1) for rank in range(len(staff_ids))]
+        requester_weights = [1.0 / (rank + 1) ** 0.7 for rank in range(len(requester_ids))]
+
+        priorities = _weighted(rng, PRIORITY_WEIGHTS, tickets)
+        statuses = _weighted(rng, STATUS_WEIGHTS, tickets)
+        ticket_rows = []
+        for i in range(tickets):
+            created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+            status = statuses[i]
+            if status in ('resolved', 'closed'):
+                updated_at = created_at + timedelta(hours=rng.expovariate(1 / 36.0))
+            else:
+                updated_at = created_at + timedelta(hours=rng.random() * 4)
+            assigned = status != 'open' or rng.random() < 0.4
+            ticket_rows.append({
+                'title': f'{rng.choice(TITLE_WORDS).title()} issue #{i}',
+                'description': ' '.join(rng.choices(TITLE_WORDS, k=rng.randint(8, 40))),
+                'status': status,
+                'priority': priorities[i],
+                'created_at': created_at,
+                'updated_at': min(updated_at, now),
+                'created_by_id': rng.choices(requester_ids, weights=requester_weights)[0],
+                'assigned_to_id': rng.choices(staff_ids, weights=staff_weights)[0] if assigned else None,
+                'category_id': rng.choice(category_ids) if rng.random() < 0.9 else None,
+            })
+        for chunk in _chunks(ticket_rows, batch_size):
+            db.session.execute(Ticket.__table__.insert(), chunk)
+        db.session.commit()
+
+        ticket_ids = [row[0] for row in db.session.query(Ticket.id).order_by(Ticket.id).all()]
+        log_rows = []
+        for ticket_id, row in zip(ticket_ids, ticket_rows):
+            for _ in range(max(0, int(rng.gauss(activity_per_ticket, activity_per_ticket / 2)))):
+                log_rows.append({
+                    'ticket_id': ticket_id,
+                    'action': rng.choice(ACTIONS),
+                    'description': 'Synthetic activity',
+                    'timestamp': row['created_at'] + (row['updated_at'] - row['created_at']) * rng.random(),
+                    'user_id': rng.choice(staff_ids),
+                })
+            if len(log_rows) >= batch_size:
+                db.session.execute(ActivityLog.__table__.insert(), log_rows)
+                log_rows = []
+        if log_rows:
+            db.session.execute(ActivityLog.__table__.insert(), log_rows)
+        db.session.commit()
+
+        attachment_rows = []
+        for i in range(attachments):
+            ticket_id = rng.choice(ticket_ids)
+            attachment_rows.append({
+                'filename': f'screenshot_{i}.png',
+                'stored_path': os.path.join(app.config['UPLOAD_FOLDER'], f'bench_{i}.png'),
+                'content_type': 'image/png',
+                'size_bytes': int(rng.lognormvariate(11, 1)),
+                'uploaded_at': now - timedelta(seconds=rng.randint(0, days * 86400)),
+                'ticket_id': ticket_id,
+                'uploaded_by_id': rng.choice(staff_ids + requester_ids),
+            })
+        for chunk in _chunks(attachment_rows, batch_size):
+            db.session.execute(Attachment.__table__.insert(), chunk)
+        db.session.commit()
+
+    return {
+        'users': users,
+        'technicians': technicians,
+        'tickets': tickets,
+        'activity_per_ticket': activity_per_ticket,
+        'attachments': attachments,
+        'days': days,
+        'seed': seed,
+    }
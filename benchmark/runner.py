@@ -0,0 +1,233 @@
+"""Scenario runner: drives the hot routes and reports latency percentiles.
+
+Requests go either through the Flask test client (in-process) or over HTTP to a
+running server such as a local gunicorn. Results are plain JSON so runs from
+different commits can be diffed with ``python -m benchmark compare``.
+"""
+import contextlib
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from .datagen import BENCH_ADMIN, BENCH_PASSWORD, BENCH_TECHNICIAN, scratch_app_options
+
+# name -> (login as, method, path builder)
+SCENARIOS = {
+    'dashboard_admin': (BENCH_ADMIN, 'GET', lambda ids, rng: '/dashboard'),
+    'dashboard_technician': (BENCH_TECHNICIAN, 'GET', lambda ids, rng: '/dashboard'),
+    'view_ticket': (BENCH_TECHNICIAN, 'GET', lambda ids, rng: f'/ticket/{rng.choice(ids)}'),
+    'update_ticket': (BENCH_TECHNICIAN, 'POST', lambda ids, rng: f'/update_ticket/{rng.choice(ids)}'),
+    'admin_analytics': (BENCH_ADMIN, 'GET', lambda ids, rng: f"/admin/analytics?range={rng.choice(['week', 'month'])}"),
+    'export_data': (BENCH_ADMIN, 'GET', lambda ids, rng: '/admin/export_data'),
+}
+UPDATE_STATUSES = ['open', 'in_progress', 'resolved', 'closed']
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(latencies, errors, elapsed):
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+class TestClientSession:
+    """One logged-in Flask test client."""
+
+    def __init__(self, app, username):
+        self.client = app.test_client()
+        self.client.post('/login', data={'username': username, 'password': BENCH_PASSWORD})
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        response.get_data()
+        return response.status_code
+
+class HttpSession:
+    """One logged-in HTTP client with its own cookie jar."""
+
+    def __init__(self, base_url, username):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect(),
+        )
+        self.request('POST', '/login', {'username': username, 'password': BENCH_PASSWORD})
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Measure the route itself, not the page it redirects to
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+def _is_ok(status):
+    return 200 <= status < 400
+
+def run_scenario(name, make_session, ticket_ids, iterations, concurrency, seed):
+    username, method, build_path = SCENARIOS[name]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_worker = [iterations // concurrency + (1 if i < iterations % concurrency else 0) for i in range(concurrency)]
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        session = make_session(username)
+        local = []
+        failed = 0
+        for _ in range(per_worker[index]):
+            path = build_path(ticket_ids, rng)
+            data = {'status': rng.choice(UPDATE_STATUSES)} if method == 'POST' else None
+            started = time.perf_counter()
+            status = session.request(method, path, data)
+            local.append(time.perf_counter() - started)
+            if not _is_ok(status):
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+@contextlib.contextmanager
+def gunicorn_server(database_uri, scratch, workers, port):
+    config, _ = scratch_app_options(scratch)
+    env = dict(os.environ, DATABASE_URL=database_uri, BOOTSTRAP_ON_START='0', LOGIN_THROTTLE_ENABLED='0',
+               **{key: str(value) for key, value in config.items()})
+    env.pop('MAIL_USERNAME', None)
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--preload', 'app:create_app()', '-w', str(workers), '-b', f'127.0.0.1:{port}'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(base_url + '/', timeout=1).read()
+                break
+            except (urllib.error.URLError, OSError):
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+def run(database_uri, scratch, scenarios=None, iterations=200, concurrency=1, warmup=5, seed=1,
+        base_url=None, gunicorn_workers=None, port=8765):
+    """Run the selected scenarios and return a JSON-serialisable result dict."""
+    from app import create_app, db, Ticket
+
+    # No outgoing mail, login throttling or background jobs; the database was set up by "generate"
+    config, instance_path = scratch_app_options(scratch)
+    app = create_app({'BOOTSTRAP_ON_START': False, 'MAIL_USERNAME': None, 'LOGIN_THROTTLE_ENABLED': False, **config},
+                     instance_path=instance_path)
+    scenarios = scenarios or list(SCENARIOS)
+    with app.app_context():
+        ticket_ids = [row[0] for row in db.session.query(Ticket.id).all()]
+    if not ticket_ids:
+        raise RuntimeError('Benchmark database has no tickets; run "generate" first')
+
+    with contextlib.ExitStack() as stack:
+        if gunicorn_workers:
+            base_url = stack.enter_context(gunicorn_server(database_uri, scratch, gunicorn_workers, port))
+            target = f'gunicorn x{gunicorn_workers}'
+        elif base_url:
+            target = base_url
+        else:
+            # Keep the app's diagnostic prints off stdout
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+            target = 'test_client'
+
+        if base_url:
+            make_session = lambda username: HttpSession(base_url, username)
+        else:
+            make_session = lambda username: TestClientSession(app, username)
+
+        results = {}
+        for name in scenarios:
+            if warmup:
+                run_scenario(name, make_session, ticket_ids, warmup, 1, seed)
+            results[name] = run_scenario(name, make_session, ticket_ids, iterations, concurrency, seed)
+            print(f"{name}: {results[name]['throughput_rps']} req/s, "
+                  f"p50 {results[name]['p50_ms']} ms, p95 {results[name]['p95_ms']} ms, "
+                  f"p99 {results[name]['p99_ms']} ms", file=sys.stderr)
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'target': target,
+            'iterations': iterations,
+            'concurrency': concurrency,
+            'tickets': len(ticket_ids),
+        },
+        'scenarios': results,
+    }
+
+def compare(baseline, candidate):
+    """Per-scenario relative change of throughput and latency percentiles."""
+    rows = {}
+    for name, new in candidate['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if not old:
+            continue
+        rows[name] = {}
+        for metric in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            before, after = old[metric], new[metric]
+            change = (after - before) / before * 100 if before else None
+            rows[name][metric] = {'before': before, 'after': after,
+                                  'change_pct': round(change, 1) if change is not None else None}
+    return {
+        'baseline': baseline.get('meta', {}).get('commit'),
+        'candidate': candidate.get('meta', {}).get('commit'),
+        'scenarios': rows,
+    }
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,600 @@
+// Admin panel actions: reports, system health and maintenance
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Confirm role changes
+    const roleSelects = document.querySelectorAll('select[name="role"]');
+    roleSelects.forEach(function(select) {
+        const originalValue = select.value;
+        select.addEventListener('change', function() {
+            const newRole = this.value;
+            const username = this.closest('tr').querySelector('td:nth-child(2) strong').textContent;
+            
+            if (!confirm(`Are you sure you want to change ${username}'s role to ${newRole}?`)) {
+                this.value = originalValue;
+                return false;
+            }
+        });
+    });
+});
+
+// Reports and exports run as background jobs; poll until the result is ready
+function runReportJob(kind, message) {
+    showLoading(message);
+    
+    return fetch('/admin/jobs', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({kind: kind})
+        })
+        .then(response => response.json())
+        .then(job => pollReportJob(job, message))
+        .then(job => {
+            hideLoading();
+            return job;
+        })
+        .catch(error => {
+            hideLoading();
+            throw error;
+        });
+}
+
+function pollReportJob(job, message) {
+    if (job.error) {
+        throw new Error(job.error);
+    }
+    if (job.status === 'done') {
+        return job;
+    }
+    if (job.status === 'failed' || job.status === 'expired') {
+        throw new Error(job.message || `job ${job.status}`);
+    }
+    showLoading(`${message} (${job.progress}%)`);
+    return new Promise(resolve => setTimeout(resolve, 1000))
+        .then(() => fetch(job.status_url))
+        .then(response => response.json())
+        .then(next => pollReportJob(next, message));
+}
+
+function generateReport() {
+    runReportJob('report', 'Generating comprehensive system report...')
+        .then(job => fetch(job.download_url + '?inline=1'))
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                showAlert('Error generating report: ' + data.error, 'danger');
+                return;
+            }
+            
+            // Create and show report modal
+            const reportModal = createReportModal(data);
+            document.body.appendChild(reportModal);
+            const modal = new bootstrap.Modal(reportModal);
+            modal.show();
+            
+            // Clean up modal when hidden
+            reportModal.addEventListener('hidden.bs.modal', function() {
+                document.body.removeChild(reportModal);
+            });
+        })
+        .catch(error => {
+            showAlert('Failed to generate report: ' + error.message, 'danger');
+        });
+}
+
+function exportData() {
+    runReportJob('export', 'Exporting tickets...')
+        .then(job => {
+            window.location = job.download_url;
+        })
+        .catch(error => {
+            showAlert('Failed to export data: ' + error.message, 'danger');
+        });
+}
+
+function systemHealth() {
+    showLoading('Checking system health...');
+    
+    fetch('/admin/system_health')
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            hideLoading();
+            if (data.error) {
+                showAlert('Error checking system health: ' + data.error, 'danger');
+                return;
+            }
+            
+            console.log('System health data:', data); // Debug log
+            // Create and show health modal
+            const healthModal = createHealthModal(data);
+            document.body.appendChild(healthModal);
+            const modal = new bootstrap.Modal(healthModal);
+            healthModal.addEventListener('shown.bs.modal', function() {
+                renderHealthHistory(healthModal.querySelector('.health-history-chart'), data.history);
+            });
+            modal.show();
+            
+            // Clean up modal when hidden
+            healthModal.addEventListener('hidden.bs.modal', function() {
+                document.body.removeChild(healthModal);
+            });
+        })
+        .catch(error => {
+            hideLoading();
+            console.error('System health error:', error); // Debug log
+            showAlert('Failed to check system health: ' + error.message, 'danger');
+        });
+}
+
+function clearCache() {
+    // Show confirmation modal first
+    const confirmModal = createConfirmModal(
+        'Clear System Cache',
+        'This will clear old activity logs and temporary data to free up system resources. This action cannot be undone.',
+        'fas fa-broom',
+        'btn-danger',
+        'Clear Cache'
+    );
+    document.body.appendChild(confirmModal);
+    const modal = new bootstrap.Modal(confirmModal);
+    modal.show();
+    
+    // Handle confirmation
+    confirmModal.querySelector('.btn-confirm').addEventListener('click', function() {
+        modal.hide();
+        
+        showLoading('Clearing system cache...');
+        
+        fetch('/admin/clear_cache', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            }
+        })
+            .then(response => response.json())
+            .then(data => {
+                hideLoading();
+                if (data.error) {
+                    showAlert('Error clearing cache: ' + data.error, 'danger');
+                    return;
+                }
+                
+                // Show results modal
+                const resultsModal = createCacheResultsModal(data);
+                document.body.appendChild(resultsModal);
+                const resultsModalInstance = new bootstrap.Modal(resultsModal);
+                resultsModalInstance.show();
+                
+                // Clean up modal when hidden
+                resultsModal.addEventListener('hidden.bs.modal', function() {
+                    document.body.removeChild(resultsModal);
+                });
+            })
+            .catch(error => {
+                hideLoading();
+                showAlert('Failed to clear cache: ' + error.message, 'danger');
+            });
+    });
+    
+    // Clean up confirmation modal when hidden
+    confirmModal.addEventListener('hidden.bs.modal', function() {
+        document.body.removeChild(confirmModal);
+    });
+}
+
+function createReportModal(data) {
+    const modal = document.createElement('div');
+    modal.className = 'modal fade';
+    modal.tabIndex = -1;
+    modal.innerHTML = `
+        <div class="modal-dialog modal-xl">
+            <div class="modal-content">
+                <div class="modal-header">
+                    <h5 class="modal-title">
+                        <i class="fas fa-chart-line me-2 text-warning"></i>System Report
+                    </h5>
+                    <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
+                </div>
+                <div class="modal-body">
+                    <div class="row mb-4">
+                        <div class="col-12">
+                            <div class="alert alert-info">
+                                <i class="fas fa-info-circle me-2"></i>
+                                <strong>Generated:</strong> ${new Date(data.generated_at).toLocaleString()}
+                            </div>
+                        </div>
+                    </div>
+                    
+                    <!-- System Overview -->
+                    <div class="row mb-4">
+                        <div class="col-12">
+                            <h6><i class="fas fa-tachometer-alt me-2"></i>System Overview</h6>
+                            <div class="row">
+                                <div class="col-md-3">
+                                    <div class="card text-center">
+                                        <div class="card-body">
+                                            <h4 class="text-primary">${data.system_overview.total_tickets}</h4>
+                                            <small>Total Tickets</small>
+                                        </div>
+                                    </div>
+                                </div>
+                                <div class="col-md-3">
+                                    <div class="card text-center">
+                                        <div class="card-body">
+                                            <h4 class="text-info">${data.system_overview.total_users}</h4>
+                                            <small>Total Users</small>
+                                        </div>
+                                    </div>
+                                </div>
+                                <div class="col-md-3">
+                                    <div class="card text-center">
+                                        <div class="card-body">
+                                            <h4 class="text-warning">${data.system_overview.open_tickets}</h4>
+                                            <small>Open Tickets</small>
+                                        </div>
+                                    </div>
+                                </div>
+                                <div class="col-md-3">
+                                    <div class="card text-center">
+                                        <div class="card-body">
+                                            <h4 class="text-success">${data.system_overview.avg_resolution_hours.toFixed(1)}h</h4>
+                                            <small>Avg Resolution</small>
+                                        </div>
+                                    </div>
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                    
+                    <!-- Priority Breakdown -->
+                    <div class="row mb-4">
+                        <div class="col-md-6">
+                            <h6><i class="fas fa-exclamation-triangle me-2"></i>Priority Breakdown</h6>
+                            <div class="row">
+                                <div class="col-6"><span class="badge bg-danger">Urgent:</span> ${data.priority_breakdown.urgent}</div>
+                                <div class="col-6"><span class="badge bg-warning">High:</span> ${data.priority_breakdown.high}</div>
+                                <div class="col-6"><span class="badge bg-info">Medium:</span> ${data.priority_breakdown.medium}</div>
+                                <div class="col-6"><span class="badge bg-success">Low:</span> ${data.priority_breakdown.low}</div>
+                            </div>
+                        </div>
+                        <div class="col-md-6">
+                            <h6><i class="fas fa-users me-2"></i>User Roles</h6>
+                            <div class="row">
+                                <div class="col-4"><span class="badge role-admin">Admins:</span> ${data.user_roles.admins}</div>
+                                <div class="col-4"><span class="badge role-technician">Techs:</span> ${data.user_roles.technicians}</div>
+                                <div class="col-4"><span class="badge role-user">Users:</span> ${data.user_roles.users}</div>
+                            </div>
+                        </div>
+                    </div>
+                    
+                    <!-- Recent Activity -->
+                    <div class="row">
+                        <div class="col-12">
+                            <h6><i class="fas fa-clock me-2"></i>Recent Activity (Last 7 Days)</h6>
+                            <p>New Tickets: <strong>${data.recent_activity.new_tickets_last_week}</strong> | 
+                               Total Activities: <strong>${data.recent_activity.total_activities_last_week}</strong></p>
+                        </div>
+                    </div>
+                </div>
+                <div class="modal-footer">
+                    <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Close</button>
+                    <button type="button" class="btn btn-primary" onclick="printReport()">
+                        <i class="fas fa-print me-2"></i>Print Report
+                    </button>
+                </div>
+            </div>
+        </div>
+    `;
+    return modal;
+}
+
+function renderHealthHistory(canvas, history) {
+    if (!canvas || !history || typeof Chart === 'undefined') {
+        return;
+    }
+    const labels = history.timestamps.map(t => new Date(t).toLocaleTimeString());
+    new Chart(canvas, {
+        type: 'line',
+        data: {
+            labels: labels,
+            datasets: [
+                { label: 'CPU %', data: history.cpu_percent, borderColor: '#dc3545', tension: 0.2, pointRadius: 0 },
+                { label: 'Memory %', data: history.memory_percent, borderColor: '#0dcaf0', tension: 0.2, pointRadius: 0 },
+                { label: 'Requests/s', data: history.request_rate, borderColor: '#198754', tension: 0.2, pointRadius: 0 }
+            ]
+        },
+        options: { responsive: true, animation: false, scales: { x: { ticks: { maxTicksLimit: 8 } } } }
+    });
+}
+
+function createHealthModal(data) {
+    const modal = document.createElement('div');
+    modal.className = 'modal fade';
+    modal.tabIndex = -1;
+    
+    // Add error handling for missing data
+    if (!data || typeof data !== 'object') {
+        modal.innerHTML = `
+            <div class="modal-dialog">
+                <div class="modal-content">
+                    <div class="modal-header">
+                        <h5 class="modal-title">
+                            <i class="fas fa-exclamation-triangle me-2 text-danger"></i>System Health Error
+                        </h5>
+                        <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
+                    </div>
+                    <div class="modal-body">
+                        <div class="alert alert-danger">
+                            <i class="fas fa-exclamation-triangle me-2"></i>
+                            <strong>Error:</strong> Unable to retrieve system health data. Please try again.
+                        </div>
+                    </div>
+                    <div class="modal-footer">
+                        <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Close</button>
+                    </div>
+                </div>
+            </div>
+        `;
+        return modal;
+    }
+    
+    const statusColor = data.overall_status === 'healthy' ? 'success' : 'warning';
+    const statusIcon = data.overall_status === 'healthy' ? 'check-circle' : 'exclamation-triangle';
+    
+    modal.innerHTML = `
+        <div class="modal-dialog modal-lg">
+            <div class="modal-content">
+                <div class="modal-header">
+                    <h5 class="modal-title">
+                        <i class="fas fa-heartbeat me-2 text-${statusColor}"></i>System Health Check
+                    </h5>
+                    <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
+                </div>
+                <div class="modal-body">
+                    <!-- Overall Status -->
+                    <div class="alert alert-${statusColor} text-center">
+                        <i class="fas fa-${statusIcon} fa-2x mb-2"></i>
+                        <h5>System Status: ${data.overall_status.toUpperCase()}</h5>
+                        <small>Last checked: ${new Date(data.timestamp).toLocaleString()}</small>
+                    </div>
+                    
+                    <!-- Database Health -->
+                    <div class="row mb-4">
+                        <div class="col-12">
+                            <h6><i class="fas fa-database me-2"></i>Database Health</h6>
+                            <div class="card">
+                                <div class="card-body">
+                                    <div class="row">
+                                        <div class="col-md-4">Status: <span class="badge bg-${data.database.status === 'healthy' ? 'success' : 'danger'}">${data.database.status}</span></div>
+                                        <div class="col-md-4">Tickets: ${data.database.total_tickets}</div>
+                                        <div class="col-md-4">Users: ${data.database.total_users}</div>
+                                    </div>
+                                    <div class="row mt-2">
+                                        <div class="col-md-4">DB size: ${data.database.db_size_mb} MB</div>
+                                        <div class="col-md-4">WAL size: ${data.database.wal_size_mb} MB</div>
+                                        <div class="col-md-4">Unassigned: ${data.queues.unassigned_tickets} / ${data.queues.open_tickets} open</div>
+                                    </div>
+                                    <div class="row mt-2">
+                                        <div class="col-md-4">Attachments: ${data.storage.attachment_count} (${data.storage.attachment_mb} MB)</div>
+                                        <div class="col-md-8">Last upload sweep: ${data.storage.last_sweep ? new Date(data.storage.last_sweep.finished_at * 1000).toLocaleString() + ', ' + data.storage.last_sweep.quarantined + ' quarantined, ' + data.storage.last_sweep.purged + ' purged' : 'never'}${data.storage.sweep_in_progress ? ' (in progress)' : ''}</div>
+                                    </div>
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                    
+                    <!-- System Resources -->
+                    <div class="row mb-4">
+                        <div class="col-12">
+                            <h6><i class="fas fa-server me-2"></i>System Resources</h6>
+                            <div class="row">
+                                <div class="col-md-4">
+                                    <div class="card text-center">
+                                        <div class="card-body">
+                                            <h5 class="text-${data.system_resources.cpu_percent > 80 ? 'danger' : 'success'}">${data.system_resources.cpu_percent}%</h5>
+                                            <small>CPU Usage</small>
+                                        </div>
+                                    </div>
+                                </div>
+                                <div class="col-md-4">
+                                    <div class="card text-center">
+                                        <div class="card-body">
+                                            <h5 class="text-${data.system_resources.memory_percent > 80 ? 'warning' : 'success'}">${data.system_resources.memory_percent}%</h5>
+                                            <small>Memory (${data.system_resources.memory_used_gb}/${data.system_resources.memory_total_gb} GB)</small>
+                                        </div>
+                                    </div>
+                                </div>
+                                <div class="col-md-4">
+                                    <div class="card text-center">
+                                        <div class="card-body">
+                                            <h5 class="text-${data.system_resources.disk_percent > 90 ? 'danger' : 'success'}">${data.system_resources.disk_percent}%</h5>
+                                            <small>Disk (${data.system_resources.disk_used_gb}/${data.system_resources.disk_total_gb} GB)</small>
+                                        </div>
+                                    </div>
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                    
+                    <!-- Application Metrics -->
+                    <div class="row">
+                        <div class="col-12">
+                            <h6><i class="fas fa-stethoscope me-2"></i>Application Metrics</h6>
+                            <div class="row">
+                                <div class="col-md-4">
+                                    <strong>Urgent Open Tickets:</strong> 
+                                    <span class="badge bg-${data.application_metrics.urgent_open_tickets > 0 ? 'danger' : 'success'}">
+                                        ${data.application_metrics.urgent_open_tickets}
+                                    </span>
+                                </div>
+                                <div class="col-md-4">
+                                    <strong>Categories:</strong> ${data.application_metrics.total_categories}
+                                </div>
+                                <div class="col-md-4">
+                                    <strong>24h Activity:</strong> ${data.application_metrics.recent_activity_count}
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                    
+                    <!-- Trends -->
+                    <div class="row mt-4">
+                        <div class="col-12">
+                            <h6><i class="fas fa-chart-area me-2"></i>Trends (${data.history.timestamps.length} samples, every ${data.sample_interval_seconds}s)</h6>
+                            <canvas class="health-history-chart" height="120"></canvas>
+                        </div>
+                    </div>
+                </div>
+                <div class="modal-footer">
+                    <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Close</button>
+                    <button type="button" class="btn btn-info" onclick="systemHealth()">
+                        <i class="fas fa-sync me-2"></i>Refresh
+                    </button>
+                </div>
+            </div>
+        </div>
+    `;
+    return modal;
+}
+
+function createConfirmModal(title, message, icon, buttonClass, buttonText) {
+    const modal = document.createElement('div');
+    modal.className = 'modal fade';
+    modal.tabIndex = -1;
+    modal.innerHTML = `
+        <div class="modal-dialog">
+            <div class="modal-content">
+                <div class="modal-header">
+                    <h5 class="modal-title">
+                        <i class="${icon} me-2"></i>${title}
+                    </h5>
+                    <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
+                </div>
+                <div class="modal-body">
+                    <div class="alert alert-warning">
+                        <i class="fas fa-exclamation-triangle me-2"></i>
+                        <strong>Warning:</strong> ${message}
+                    </div>
+                    <p class="mb-0">Are you sure you want to proceed with this action?</p>
+                </div>
+                <div class="modal-footer">
+                    <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Cancel</button>
+                    <button type="button" class="btn ${buttonClass} btn-confirm">
+                        <i class="${icon} me-2"></i>${buttonText}
+                    </button>
+                </div>
+            </div>
+        </div>
+    `;
+    return modal;
+}
+
+function createCacheResultsModal(data) {
+    const modal = document.createElement('div');
+    modal.className = 'modal fade';
+    modal.tabIndex = -1;
+    modal.innerHTML = `
+        <div class="modal-dialog">
+            <div class="modal-content">
+                <div class="modal-header">
+                    <h5 class="modal-title">
+                        <i class="fas fa-check-circle me-2 text-success"></i>Cache Cleared Successfully
+                    </h5>
+                    <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
+                </div>
+                <div class="modal-body">
+                    <div class="alert alert-success">
+                        <i class="fas fa-check-circle me-2"></i>
+                        <strong>Success!</strong> ${data.message}
+                    </div>
+                    
+                    <h6><i class="fas fa-list me-2"></i>Items Cleared:</h6>
+                    <div class="row">
+                        <div class="col-12">
+                            <ul class="list-group list-group-flush">
+                                ${Object.entries(data.cleared_items).map(([key, value]) => `
+                                    <li class="list-group-item d-flex justify-content-between align-items-center">
+                                        <span>
+                                            <i class="fas fa-trash me-2 text-muted"></i>
+                                            ${key.replace('_', ' ').replace(/\b\w/g, l => l.toUpperCase())}
+                                        </span>
+                                        <span class="badge bg-primary rounded-pill">${value}</span>
+                                    </li>
+                                `).join('')}
+                            </ul>
+                        </div>
+                    </div>
+                    
+                    <div class="mt-3">
+                        <small class="text-muted">
+                            <i class="fas fa-info-circle me-1"></i>
+                            Cache clearing helps maintain system performance and free up storage space.
+                        </small>
+                    </div>
+                </div>
+                <div class="modal-footer">
+                    <button type="button" class="btn btn-primary" data-bs-dismiss="modal">
+                        <i class="fas fa-check me-2"></i>OK
+                    </button>
+                </div>
+            </div>
+        </div>
+    `;
+    return modal;
+}
+
+function showLoading(message) {
+    // Remove existing loading if any
+    const existing = document.getElementById('loadingModal');
+    if (existing) existing.remove();
+    
+    const loading = document.createElement('div');
+    loading.id = 'loadingModal';
+    loading.className = 'modal fade show';
+    loading.style.display = 'block';
+    loading.innerHTML = `
+        <div class="modal-dialog modal-sm">
+            <div class="modal-content">
+                <div class="modal-body text-center">
+                    <div class="spinner-border text-primary mb-3" role="status"></div>
+                    <p class="mb-0">${message}</p>
+                </div>
+            </div>
+        </div>
+    `;
+    document.body.appendChild(loading);
+}
+
+function hideLoading() {
+    const loading = document.getElementById('loadingModal');
+    if (loading) loading.remove();
+}
+
+function showAlert(message, type) {
+    const alert = document.createElement('div');
+    alert.className = `alert alert-${type} alert-dismissible fade show`;
+    alert.innerHTML = `
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+    
+    const container = document.querySelector('.container');
+    container.insertBefore(alert, container.firstChild);
+    
+    // Auto-hide after 5 seconds
+    setTimeout(() => {
+        if (alert.parentNode) {
+            alert.remove();
+        }
+    }, 5000);
+}
+
+function printReport() {
+    window.print();
+}
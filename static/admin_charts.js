@@ -0,0 +1,112 @@
+// Admin panel charts (requires Chart.js)
+
+document.addEventListener('DOMContentLoaded', function() {
+    try {
+        const priorityCtx = document.getElementById('priorityChart');
+        const statusCtx = document.getElementById('statusChart');
+        if (priorityCtx && statusCtx && window.Chart) {
+            const priorityCounts = JSON.parse(document.getElementById('priorityCountsData').textContent);
+            const statusCounts = JSON.parse(document.getElementById('statusCountsData').textContent);
+            const priorityData = {
+                labels: ['Urgent', 'High', 'Medium', 'Low'],
+                datasets: [{
+                    label: 'Tickets',
+                    data: [priorityCounts.urgent, priorityCounts.high, priorityCounts.medium, priorityCounts.low],
+                    backgroundColor: ['#dc3545','#fd7e14','#0dcaf0','#6c757d']
+                }]
+            };
+            new Chart(priorityCtx, { type: 'doughnut', data: priorityData, options: { responsive: true } });
+
+            const statusData = {
+                labels: ['Open', 'In Progress', 'Resolved', 'Closed'],
+                datasets: [{
+                    label: 'Tickets',
+                    data: [statusCounts.open, statusCounts.in_progress, statusCounts.resolved, statusCounts.closed],
+                    backgroundColor: ['#0d6efd','#20c997','#198754','#6c757d']
+                }]
+            };
+            new Chart(statusCtx, { type: 'bar', data: statusData, options: { responsive: true, plugins: { legend: { display: false } } } });
+        }
+    } catch (e) { console.error('Chart init error', e); }
+});
+
+// Dynamic analytics charts for volume, category, and technician performance
+let volumeChartRef = null;
+let categoryChartRef = null;
+let techChartRef = null;
+
+function loadAnalytics(range) {
+    fetch(`/admin/analytics?range=${encodeURIComponent(range)}`)
+      .then(r => r.json())
+      .then(data => {
+        if (data.error) {
+            showAlert('Analytics error: ' + data.error, 'danger');
+            return;
+        }
+        const volCtx = document.getElementById('volumeChart');
+        if (volCtx && window.Chart) {
+            if (volumeChartRef) volumeChartRef.destroy();
+            volumeChartRef = new Chart(volCtx, {
+                type: 'line',
+                data: {
+                    labels: data.volume_by_day.labels,
+                    datasets: [{ label: 'Tickets', data: data.volume_by_day.counts, borderColor: '#0d6efd', backgroundColor: 'rgba(13,110,253,0.2)', fill: true }]
+                },
+                options: { responsive: true, plugins: { legend: { display: false } } }
+            });
+        }
+        const resCtx = document.getElementById('resolutionChart');
+        if (resCtx && window.Chart) {
+            if (window.resolutionChartRef) window.resolutionChartRef.destroy();
+            window.resolutionChartRef = new Chart(resCtx, {
+                type: 'line',
+                data: {
+                    labels: data.resolution_trend.labels,
+                    datasets: [{ label: 'Avg Hours', data: data.resolution_trend.avg_hours, borderColor: '#20c997', backgroundColor: 'rgba(32,201,151,0.2)', fill: true }]
+                },
+                options: { responsive: true, plugins: { legend: { display: false } } }
+            });
+        }
+        const slaCtx = document.getElementById('slaChart');
+        if (slaCtx && window.Chart) {
+            if (window.slaChartRef) window.slaChartRef.destroy();
+            window.slaChartRef = new Chart(slaCtx, {
+                type: 'bar',
+                data: {
+                    labels: data.sla_breaches_by_day.labels,
+                    datasets: [{ label: 'Breaches', data: data.sla_breaches_by_day.counts, backgroundColor: '#dc3545' }]
+                },
+                options: { responsive: true, plugins: { legend: { display: false } } }
+            });
+        }
+        const catCtx = document.getElementById('categoryChart');
+        if (catCtx && window.Chart) {
+            if (categoryChartRef) categoryChartRef.destroy();
+            categoryChartRef = new Chart(catCtx, {
+                type: 'doughnut',
+                data: {
+                    labels: data.category_counts.map(c => c.name),
+                    datasets: [{ data: data.category_counts.map(c => c.count), backgroundColor: ['#0dcaf0','#6f42c1','#20c997','#ffc107','#dc3545','#6c757d'] }]
+                },
+                options: { responsive: true }
+            });
+        }
+        const techCtx = document.getElementById('techChart');
+        if (techCtx && window.Chart) {
+            if (techChartRef) techChartRef.destroy();
+            techChartRef = new Chart(techCtx, {
+                type: 'bar',
+                data: {
+                    labels: data.technician_performance.map(t => t.username),
+                    datasets: [{ label: 'Closed', data: data.technician_performance.map(t => t.closed_count), backgroundColor: '#198754' }]
+                },
+                options: { responsive: true, plugins: { legend: { display: false } } }
+            });
+        }
+      })
+      .catch(err => showAlert('Failed to load analytics: ' + err.message, 'danger'));
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    loadAnalytics('week');
+});
@@ -42,8 +42,8 @@ document.addEventListener('DOMContentLoaded', function() {
     // Auto-refresh dashboard every 30 seconds
     if (window.location.pathname === '/dashboard') {
         setInterval(function() {
-            // Only refresh if the page is visible
-            if (!document.hidden) {
+            // Only refresh if the page is visible and no bulk selection is in progress
+            if (!document.hidden && !document.querySelector('.bulk-select:checked')) {
                 location.reload();
             }
         }, 30000);